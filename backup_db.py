@@ -3,23 +3,392 @@ import json
 import os
 import shutil
 import datetime
-import argparse
-import glob
+import contextlib
+import errno
+import functools
+import hashlib
+import heapq
+import logging
+import mmap
 import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
 
-def backup_database(source_file, backup_dir=None, max_backups=10):
+logger = logging.getLogger(__name__)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# File in the backup directory mapping backup names to source SHA-256 digests
+_HASHES_FILE = ".hashes"
+
+# Threads used to stat backups in parallel for the list action
+_LIST_STAT_WORKERS = 8
+
+# Suffix appended to compressed backup files
+_ZSTD_SUFFIX = ".zst"
+
+# Suffix of files still being written; they are renamed into place when complete
+_TMP_SUFFIX = ".tmp"
+
+def _map_file(f):
+    """Memory-map an open file read-only, hinting sequential access.
+    
+    Args:
+        f: File object opened in binary mode
+    
+    Returns:
+        mmap.mmap: Read-only mapping of the whole file
+    """
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+# Bytes JSON treats as insignificant whitespace
+_JSON_WHITESPACE = b" \t\n\r"
+
+# Opening byte of a JSON document mapped to the byte that must close it
+_JSON_BRACKETS = {ord("{"): ord("}"), ord("["): ord("]")}
+
+# Bytes read per probe when looking for the first/last significant byte
+_SANITY_PROBE_SIZE = 64
+
+def _quick_json_sanity(path):
+    """Cheaply check that a file looks like a complete JSON object or array.
+    
+    Reads only the first and last few bytes and checks that the first
+    significant byte is '{' or '[' and the last one is its closing pair.
+    This catches empty and truncated files without parsing the body; use
+    _validate_json for a full check.
+    
+    Args:
+        path (str): Path to the JSON file
+    
+    Returns:
+        bool: True if the file passes the check
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        
+        first = None
+        offset = 0
+        while first is None and offset < size:
+            chunk = os.pread(fd, _SANITY_PROBE_SIZE, offset).lstrip(_JSON_WHITESPACE)
+            if chunk:
+                first = chunk[0]
+            offset += _SANITY_PROBE_SIZE
+        
+        last = None
+        end = size
+        while last is None and end > 0:
+            start = max(0, end - _SANITY_PROBE_SIZE)
+            chunk = os.pread(fd, end - start, start).rstrip(_JSON_WHITESPACE)
+            if chunk:
+                last = chunk[-1]
+            end = start
+    finally:
+        os.close(fd)
+    
+    return first in _JSON_BRACKETS and _JSON_BRACKETS[first] == last
+
+def _validate_json(path):
+    """Check that a file contains well-formed JSON.
+    
+    Used when ijson is unavailable; otherwise _validating_copy validates
+    while copying. Prefers pysimdjson, which validates without building a
+    Python object tree, reading the file through a memory map so the OS can
+    read ahead instead of copying into buffers. Falls back to the standard
+    json module.
+    
+    Args:
+        path (str): Path to the JSON file
+    
+    Raises:
+        ValueError: If the file is not valid JSON
+    """
+    if simdjson is not None:
+        with open(path, 'rb') as f, _map_file(f) as mm:
+            simdjson.Parser().parse(mm)
+        return
+    
+    with open(path, 'r') as f:
+        json.load(f)
+
+# Read size for the userspace fallback copy
+_COPY_BUFSIZE = 1024 * 1024
+
+# Upper bound on bytes requested per in-kernel copy call
+_KERNEL_COPY_CHUNK = 1024 * 1024 * 1024
+
+# Errors meaning the in-kernel copy is unsupported for this pair of files
+_KERNEL_COPY_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP}
+
+def _fsync_dir(path):
+    """Flush a directory entry update (such as a rename) to disk."""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    except OSError:
+        # Directories cannot be opened for fsync on every platform
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextlib.contextmanager
+def _atomic_output(path, copystat_from=None):
+    """Open a temporary file that atomically replaces path once written.
+    
+    The data is fsynced before the rename and the containing directory
+    afterwards, so a crash leaves either the old file or the complete new
+    one, never a partial copy.
+    
+    Args:
+        path (str): Final destination path
+        copystat_from (str): File whose metadata is copied to path, like
+            shutil.copy2; applied once the temporary file is closed so no
+            later write resets its mtime
+    
+    Yields:
+        file: Binary file object for the temporary file
+    """
+    tmp = path + _TMP_SUFFIX
+    try:
+        with open(tmp, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if copystat_from is not None:
+            shutil.copystat(copystat_from, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_dir(os.path.dirname(path) or ".")
+
+def _fast_copy(src, dst):
+    """Copy a file and its metadata, keeping the data in the kernel if possible.
+    
+    Tries os.copy_file_range (which can reflink on CoW filesystems), then
+    os.sendfile, and finally a buffered userspace copy. File metadata is
+    copied afterwards, matching shutil.copy2, and dst is replaced atomically.
+    
+    Args:
+        src (str): Path to the file to copy
+        dst (str): Destination path
+    """
+    with open(src, 'rb') as fsrc, _atomic_output(dst, copystat_from=src) as fdst:
+        in_fd = fsrc.fileno()
+        out_fd = fdst.fileno()
+        copied = False
+        
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(in_fd, out_fd, _KERNEL_COPY_CHUNK):
+                    pass
+                copied = True
+            except OSError as e:
+                if e.errno not in _KERNEL_COPY_ERRNOS:
+                    raise
+        
+        if not copied and hasattr(os, 'sendfile'):
+            try:
+                while os.sendfile(out_fd, in_fd, None, _KERNEL_COPY_CHUNK):
+                    pass
+                copied = True
+            except OSError as e:
+                if e.errno not in _KERNEL_COPY_ERRNOS:
+                    raise
+        
+        if not copied:
+            shutil.copyfileobj(fsrc, fdst, _COPY_BUFSIZE)
+
+def _stamp():
+    """Return a nanosecond-resolution local timestamp for backup filenames.
+    
+    The seconds part keeps the historical YYYYmmdd_HHMMSS local-time layout
+    so new names still sort after existing backups; the nanosecond suffix
+    keeps backups taken within the same second from overwriting each other.
+    """
+    ns = time.time_ns()
+    t = time.localtime(ns // 1_000_000_000)
+    return (
+        f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}_"
+        f"{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}_{ns % 1_000_000_000:09d}"
+    )
+
+def _compress_copy(src, dst):
+    """Write a zstd-compressed copy of src to dst.
+    
+    Frames carry a content checksum so corruption is detected on restore.
+    
+    Args:
+        src (str): Path to the file to compress
+        dst (str): Destination path
+    """
+    cctx = zstd.ZstdCompressor(level=3, write_checksum=True)
+    with open(src, 'rb') as fsrc, _atomic_output(dst, copystat_from=src) as fdst:
+        cctx.copy_stream(fsrc, fdst, read_size=_COPY_BUFSIZE, write_size=_COPY_BUFSIZE)
+
+def _decompress_copy(src, dst):
+    """Decompress a zstd backup into dst, replacing dst only on success.
+    
+    Args:
+        src (str): Path to the compressed backup
+        dst (str): Destination path
+    
+    Raises:
+        zstd.ZstdError: If the frame is corrupt, fails its checksum or is truncated
+    """
+    dobj = zstd.ZstdDecompressor().decompressobj()
+    with open(src, 'rb') as fsrc, _atomic_output(dst, copystat_from=src) as fdst:
+        for chunk in iter(lambda: fsrc.read(_COPY_BUFSIZE), b""):
+            fdst.write(dobj.decompress(chunk))
+        if not dobj.eof:
+            raise zstd.ZstdError(f"{src} is truncated")
+
+def _discard():
+    """Coroutine sink that ignores the parse events sent to it."""
+    while True:
+        yield
+
+def _validating_copy(src, dst, compress=False):
+    """Copy src to dst while validating and hashing it, reading src only once.
+    
+    Each chunk is fed to ijson's push parser and to a SHA-256 digest, and
+    written to dst (through a zstd compressor if compress is set). dst is
+    only put in place if the whole document parsed, so this replaces a
+    separate _validate_json pass. Requires ijson.
+    
+    Args:
+        src (str): Path to the JSON file to copy
+        dst (str): Destination path
+        compress (bool): Write a zstd-compressed copy
+    
+    Returns:
+        str: Hex SHA-256 digest of src's contents
+    
+    Raises:
+        ValueError: If src is not valid JSON
+    """
+    sink = _discard()
+    next(sink)
+    parser = ijson.basic_parse_coro(sink)
+    digest = hashlib.sha256()
+    
+    with open(src, 'rb') as fsrc, _atomic_output(dst, copystat_from=src) as fdst:
+        if compress:
+            cctx = zstd.ZstdCompressor(level=3, write_checksum=True)
+            writer = cctx.stream_writer(fdst, write_size=_COPY_BUFSIZE, closefd=False)
+        else:
+            writer = contextlib.nullcontext(fdst)
+        
+        with writer as out:
+            try:
+                for chunk in iter(lambda: fsrc.read(_COPY_BUFSIZE), b""):
+                    parser.send(chunk)
+                    digest.update(chunk)
+                    out.write(chunk)
+                parser.close()
+            except ijson.JSONError as e:
+                raise ValueError(str(e)) from e
+    
+    return digest.hexdigest()
+
+def _file_sha256(path):
+    """Return the hex SHA-256 digest of a file's contents."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(_COPY_BUFSIZE), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _load_hashes(backup_dir):
+    """Load the backup name -> source digest map, or {} if missing or unreadable."""
+    try:
+        with open(os.path.join(backup_dir, _HASHES_FILE), 'r') as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return hashes if isinstance(hashes, dict) else {}
+
+def _save_hashes(backup_dir, hashes):
+    """Atomically write the backup name -> source digest map."""
+    with _atomic_output(os.path.join(backup_dir, _HASHES_FILE)) as f:
+        f.write(json.dumps(hashes, indent=2, sort_keys=True).encode())
+
+def _entry_name(entry):
+    """Sort key for backup entries; names embed the backup timestamp."""
+    return entry.name
+
+@functools.lru_cache(maxsize=64)
+def _backup_prefix(filename):
+    """Return the name prefix shared by every backup of filename."""
+    return f"{filename}.backup."
+
+def _iter_backups(backup_dir, prefix):
+    """Yield completed backup entries in backup_dir whose names start with prefix."""
+    with os.scandir(backup_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith(prefix) and not name.endswith(_TMP_SUFFIX):
+                yield entry
+
+def _backup_files(backup_dir, filename):
+    """Return the backup entries for filename, or () if backup_dir is missing.
+    
+    The directory is listed on every call: its mtime can be too coarse to
+    tell two quick changes apart, so it cannot key a cached listing.
+    Backup names embed their timestamp, so callers order entries by name.
+    """
+    try:
+        return tuple(_iter_backups(backup_dir, _backup_prefix(filename)))
+    except FileNotFoundError:
+        return ()
+
+def backup_database(source_file, backup_dir=None, max_backups=10, strict=False, compress=False):
     """Create a backup of the database file.
     
     Args:
         source_file (str): Path to the database file
         backup_dir (str): Directory to store backups (default: same as source)
         max_backups (int): Maximum number of backups to keep
+        strict (bool): Fully parse the JSON instead of only a quick check
+        compress (bool): Store the backup zstd-compressed (requires zstandard)
     
     Returns:
         str: Path to the backup file or empty string on failure
     """
-    if not os.path.exists(source_file):
-        print(f"ERROR: Source file {source_file} does not exist")
+    try:
+        source_stat = os.stat(source_file)
+    except FileNotFoundError:
+        logger.error("Source file %s does not exist", source_file)
+        return ""
+    
+    if source_stat.st_size == 0:
+        logger.error("Source file %s is empty", source_file)
+        return ""
+    
+    if compress and zstd is None:
+        logger.error("Compressed backups require the zstandard package")
         return ""
     
     # Set backup directory
@@ -30,74 +399,137 @@ def backup_database(source_file, backup_dir=None, max_backups=10):
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir, exist_ok=True)
     
-    # Generate backup filename with timestamp
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = os.path.basename(source_file)
-    backup_file = os.path.join(backup_dir, f"{filename}.backup.{timestamp}")
+    
+    # Only a latest backup in the requested format can stand in for a new one
+    latest = max(_backup_files(backup_dir, filename), key=_entry_name, default=None)
+    if latest is not None and latest.name.endswith(_ZSTD_SUFFIX) != compress:
+        latest = None
+    
+    # Generate backup filename with timestamp
+    timestamp = _stamp()
+    backup_file = os.path.join(backup_dir, _backup_prefix(filename) + timestamp)
+    if compress:
+        backup_file += _ZSTD_SUFFIX
     
     try:
         # Validate JSON before backing up
-        with open(source_file, 'r') as f:
-            data = json.load(f)
+        if not _quick_json_sanity(source_file):
+            raise ValueError("truncated or empty JSON document")
         
-        # Create backup
-        shutil.copy2(source_file, backup_file)
-        print(f"Created backup: {backup_file}")
+        hashes = _load_hashes(backup_dir)
+        
+        # Create backup; in strict mode validate and hash while copying when
+        # possible, and drop the copy again if it matches the latest backup
+        if strict and ijson is not None:
+            source_hash = _validating_copy(source_file, backup_file, compress)
+            if latest is not None and hashes.get(latest.name) == source_hash:
+                os.remove(backup_file)
+                logger.info("Source content matches %s, skipping backup", latest.path)
+                return latest.path
+        else:
+            if strict:
+                _validate_json(source_file)
+            
+            # Skip the copy if the content matches the latest backup
+            source_hash = _file_sha256(source_file)
+            if latest is not None and hashes.get(latest.name) == source_hash:
+                logger.info("Source content matches %s, skipping backup", latest.path)
+                return latest.path
+            
+            if compress:
+                _compress_copy(source_file, backup_file)
+            else:
+                _fast_copy(source_file, backup_file)
+        logger.info("Created backup: %s", backup_file)
         
         # Clean up old backups if needed
         if max_backups > 0:
-            pattern = os.path.join(backup_dir, f"{filename}.backup.*")
-            backup_files = sorted(glob.glob(pattern))
+            backup_files = _backup_files(backup_dir, filename)
             
             if len(backup_files) > max_backups:
-                files_to_delete = backup_files[:-max_backups]
+                files_to_delete = heapq.nsmallest(
+                    len(backup_files) - max_backups, backup_files, key=_entry_name
+                )
+                removed = []
+                unlink = os.unlink
                 for old_file in files_to_delete:
-                    os.remove(old_file)
-                    print(f"Removed old backup: {old_file}")
+                    try:
+                        unlink(old_file.path)
+                        removed.append(old_file.path)
+                    except FileNotFoundError:
+                        # Already removed, e.g. by a concurrent cleanup
+                        pass
+                    hashes.pop(old_file.name, None)
+                if removed:
+                    logger.info("Removed old backup(s): %s", ", ".join(removed))
+        
+        hashes[os.path.basename(backup_file)] = source_hash
+        _save_hashes(backup_dir, hashes)
         
         return backup_file
-    except json.JSONDecodeError:
-        print(f"ERROR: Source file {source_file} is not valid JSON")
+    except ValueError:
+        logger.error("Source file %s is not valid JSON", source_file)
         return ""
     except Exception as e:
-        print(f"ERROR: Failed to create backup: {str(e)}")
+        logger.error("Failed to create backup: %s", e)
         return ""
 
-def restore_database(backup_file, target_file):
+def restore_database(backup_file, target_file, strict=False):
     """Restore database from a backup file.
     
     Args:
         backup_file (str): Path to the backup file
         target_file (str): Path to restore to
+        strict (bool): Fully parse the JSON instead of only a quick check
     
     Returns:
         bool: True if successful, False otherwise
     """
     if not os.path.exists(backup_file):
-        print(f"ERROR: Backup file {backup_file} does not exist")
+        logger.error("Backup file %s does not exist", backup_file)
+        return False
+    
+    compressed = backup_file.endswith(_ZSTD_SUFFIX)
+    if compressed and zstd is None:
+        logger.error("Restoring a compressed backup requires the zstandard package")
         return False
     
+    current_backup = None
     try:
-        # Validate JSON before restoring
-        with open(backup_file, 'r') as f:
-            data = json.load(f)
+        # Validate JSON before restoring; compressed backups are verified
+        # by their frame checksum while decompressing instead
+        if not compressed:
+            if not _quick_json_sanity(backup_file):
+                raise ValueError("truncated or empty JSON document")
+            if strict and ijson is None:
+                _validate_json(backup_file)
         
         # Create backup of current file if it exists
         if os.path.exists(target_file):
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = _stamp()
             current_backup = f"{target_file}.before_restore.{timestamp}"
-            shutil.copy2(target_file, current_backup)
-            print(f"Backed up current file to: {current_backup}")
+            _fast_copy(target_file, current_backup)
+            logger.info("Backed up current file to: %s", current_backup)
         
         # Restore from backup
-        shutil.copy2(backup_file, target_file)
-        print(f"Restored database from: {backup_file}")
+        if compressed:
+            _decompress_copy(backup_file, target_file)
+        elif strict and ijson is not None:
+            _validating_copy(backup_file, target_file)
+        else:
+            _fast_copy(backup_file, target_file)
+        logger.info("Restored database from: %s", backup_file)
         return True
-    except json.JSONDecodeError:
-        print(f"ERROR: Backup file {backup_file} is not valid JSON")
+    except ValueError:
+        # A strict copy validates while copying, after the safety copy was made;
+        # the target was not replaced, so the safety copy is not needed
+        if current_backup is not None and os.path.exists(current_backup):
+            os.remove(current_backup)
+        logger.error("Backup file %s is not valid JSON", backup_file)
         return False
     except Exception as e:
-        print(f"ERROR: Failed to restore database: {str(e)}")
+        logger.error("Failed to restore database: %s", e)
         return False
 
 def find_latest_backup(source_file, backup_dir=None):
@@ -114,30 +546,106 @@ def find_latest_backup(source_file, backup_dir=None):
         backup_dir = os.path.dirname(source_file) or "."
     
     filename = os.path.basename(source_file)
-    pattern = os.path.join(backup_dir, f"{filename}.backup.*")
+    latest = max(_backup_files(backup_dir, filename), key=_entry_name, default=None)
     
-    backup_files = sorted(glob.glob(pattern))
-    
-    if not backup_files:
-        print("No backup files found")
+    if latest is None:
+        logger.warning("No backup files found")
         return ""
     
-    latest = backup_files[-1]
-    print(f"Latest backup: {latest}")
-    return latest
+    logger.info("Latest backup: %s", latest.path)
+    return latest.path
 
-if __name__ == "__main__":
+# CLI actions, and the defaults/option spellings shared by both argument parsers
+_CLI_ACTIONS = ("backup", "restore", "list")
+_CLI_DEFAULTS = {
+    "file": "data/store_bot_db.json",
+    "backup_dir": None,
+    "max_backups": 10,
+    "backup_file": None,
+    "strict": False,
+    "compress": False,
+    "verbose": False,
+}
+_CLI_VALUE_OPTIONS = {
+    "--file": "file",
+    "--backup-dir": "backup_dir",
+    "--max-backups": "max_backups",
+    "--backup-file": "backup_file",
+}
+_CLI_FLAGS = {
+    "--strict": "strict",
+    "--compress": "compress",
+    "--verbose": "verbose",
+    "-v": "verbose",
+}
+
+def _parse_args_fast(argv):
+    """Parse the common scripted CLI forms without importing argparse.
+    
+    Handles '<action> [--option value | --option=value | --flag]...' with
+    exact option names. Anything else (--help, abbreviations, bad values)
+    returns None so the caller can fall back to argparse for full
+    validation and error messages.
+    
+    Args:
+        argv (list): Command line arguments, excluding the program name
+    
+    Returns:
+        types.SimpleNamespace: Parsed arguments, or None to use argparse
+    """
+    if not argv or argv[0] not in _CLI_ACTIONS:
+        return None
+    
+    opts = dict(_CLI_DEFAULTS, action=argv[0])
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _CLI_FLAGS:
+            opts[_CLI_FLAGS[arg]] = True
+        else:
+            name, has_value, value = arg.partition("=")
+            if name not in _CLI_VALUE_OPTIONS:
+                return None
+            if not has_value:
+                i += 1
+                if i == len(argv) or argv[i].startswith("-"):
+                    return None
+                value = argv[i]
+            opts[_CLI_VALUE_OPTIONS[name]] = value
+        i += 1
+    
+    try:
+        opts["max_backups"] = int(opts["max_backups"])
+    except ValueError:
+        return None
+    return types.SimpleNamespace(**opts)
+
+def _parse_args(argv):
+    """Parse CLI arguments with argparse (help, abbreviations, error reporting)."""
+    import argparse
+    
     parser = argparse.ArgumentParser(description="Database backup and restore utility")
-    parser.add_argument("action", choices=["backup", "restore", "list"], help="Action to perform")
-    parser.add_argument("--file", default="data/store_bot_db.json", help="Database file path")
+    parser.add_argument("action", choices=_CLI_ACTIONS, help="Action to perform")
+    parser.add_argument("--file", default=_CLI_DEFAULTS["file"], help="Database file path")
     parser.add_argument("--backup-dir", help="Directory to store backups")
-    parser.add_argument("--max-backups", type=int, default=10, help="Maximum number of backups to keep")
+    parser.add_argument("--max-backups", type=int, default=_CLI_DEFAULTS["max_backups"], help="Maximum number of backups to keep")
     parser.add_argument("--backup-file", help="Specific backup file to restore from")
+    parser.add_argument("--strict", action="store_true", help="Fully parse the JSON instead of a quick structural check")
+    parser.add_argument("--compress", action="store_true", help="Store backups zstd-compressed (requires zstandard)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Report each step, not only errors")
+    
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = _parse_args_fast(sys.argv[1:]) or _parse_args(sys.argv[1:])
     
-    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(levelname)s: %(message)s'
+    )
     
     if args.action == "backup":
-        result = backup_database(args.file, args.backup_dir, args.max_backups)
+        result = backup_database(args.file, args.backup_dir, args.max_backups, args.strict, args.compress)
         if not result:
             sys.exit(1)
     
@@ -149,7 +657,7 @@ if __name__ == "__main__":
             if not backup_file:
                 sys.exit(1)
         
-        result = restore_database(backup_file, args.file)
+        result = restore_database(backup_file, args.file, args.strict)
         if not result:
             sys.exit(1)
     
@@ -158,15 +666,18 @@ if __name__ == "__main__":
             args.backup_dir = os.path.dirname(args.file) or "."
         
         filename = os.path.basename(args.file)
-        pattern = os.path.join(args.backup_dir, f"{filename}.backup.*")
-        
-        backup_files = sorted(glob.glob(pattern))
+        backup_files = sorted(_backup_files(args.backup_dir, filename), key=_entry_name)
         
         if not backup_files:
             print("No backup files found")
         else:
-            print(f"Found {len(backup_files)} backup(s):")
-            for backup in backup_files:
-                size = os.path.getsize(backup) / 1024  # KB
-                modified = datetime.datetime.fromtimestamp(os.path.getmtime(backup))
-                print(f"{backup} ({size:.1f} KB, {modified})") 
\ No newline at end of file
+            # stat() releases the GIL, so cold-cache lookups overlap across threads
+            with ThreadPoolExecutor(max_workers=_LIST_STAT_WORKERS) as executor:
+                stats = list(executor.map(os.DirEntry.stat, backup_files))
+            
+            lines = [f"Found {len(backup_files)} backup(s):"]
+            for backup, st in zip(backup_files, stats):
+                size = st.st_size / 1024  # KB
+                modified = datetime.datetime.fromtimestamp(st.st_mtime)
+                lines.append(f"{backup.path} ({size:.1f} KB, {modified})")
+            print("\n".join(lines)) 
\ No newline at end of file
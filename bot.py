@@ -1,58 +1,212 @@
 import os
+import asyncio
 import logging
+import re
+import secrets
 import sys
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, BotCommand
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext, CallbackQueryHandler, ConversationHandler
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo, InputMediaDocument, ReplyKeyboardMarkup, KeyboardButton, BotCommand
+from telegram.error import InvalidToken
+from telegram.request import HTTPXRequest
+from telegram.ext import Application, ApplicationBuilder, BaseUpdateProcessor, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler, ConversationHandler
 from dotenv import load_dotenv
 
-import database as db
+import db_cache as db
 from healthcheck import run_health_server
 
 # Load environment variables
 load_dotenv()
 
-# Enable logging
+# Storage channel, read once; numeric ids are passed to Telegram as ints, "@name" usernames as-is
+CHANNEL_ID = os.getenv("CHANNEL_ID")
+if CHANNEL_ID and CHANNEL_ID.lstrip('-').isdigit():
+    CHANNEL_ID = int(CHANNEL_ID)
+
+# Enable logging; force replaces the stderr handler database installs on import
 logging.basicConfig(
+    stream=sys.stdout,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+    level=logging.INFO,
+    force=True
 )
 logger = logging.getLogger(__name__)
 
-# Add console output for better debugging
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-logger.addHandler(console_handler)
-
 # Conversation states
 CHOOSING_CATEGORY, CREATE_CATEGORY, WAITING_FOR_CATEGORY_NAME, CHOOSING_FILE, MAIN_MENU = range(5)
 
-def set_bot_commands(updater):
-    """Set the bot commands menu in Telegram."""
-    commands = [
-        BotCommand("start", "Start the bot"),
-        BotCommand("menu", "Open the main menu"),
-        BotCommand("files", "Browse your stored files"),
-        BotCommand("categories", "Manage your categories"),
-        BotCommand("delete", "Delete a category"),
-        BotCommand("help", "Show help information"),
-    ]
-    updater.bot.set_my_commands(commands)
+# Limit for concurrent copy_message calls, kept well below Telegram's ~30 msg/s limit
+COPY_SEMAPHORE = asyncio.Semaphore(6)
 
-def get_main_menu_keyboard():
-    """Return the main menu keyboard."""
-    keyboard = [
-        [
-            InlineKeyboardButton("📂 Browse Files", callback_data='menu_files'),
-            InlineKeyboardButton("📁 Categories", callback_data='menu_categories')
-        ],
-        [
-            InlineKeyboardButton("❓ Help", callback_data='help'),
-            InlineKeyboardButton("🗑 Delete Category", callback_data='menu_delete')
-        ]
+# Worker threads for blocking database calls
+DB_EXECUTOR_WORKERS = 32
+
+# Delay (seconds) for coalescing upload confirmation edits during a burst of uploads
+CONFIRMATION_EDIT_DELAY = 0.75
+
+# Media attributes checked on incoming messages, in priority order, with the attribute holding the file name
+TYPE_PROBES = (
+    ('photo', None),
+    ('video', 'file_name'),
+    ('document', 'file_name'),
+    ('audio', 'file_name'),
+    ('voice', None),
+    ('animation', 'file_name'),
+)
+
+# File types that can be sent as an album with send_media_group, mapped to (album kind, InputMedia class).
+# Photos and videos may share an album; documents can only be grouped with other documents.
+MEDIA_GROUP_TYPES = {
+    'photo': ('visual', InputMediaPhoto),
+    'video': ('visual', InputMediaVideo),
+    'document': ('document', InputMediaDocument),
+}
+
+# user_data keys describing the current upload session
+_UPLOAD_KEYS = ('current_category', 'files_uploaded', 'last_confirmation_message_id')
+
+# callback_data patterns, compiled once and shared by the handler registrations in main()
+_P_BACK_TO_MENU = re.compile(r'^back_to_menu$')
+_P_HELP = re.compile(r'^help$')
+_P_MENU_FILES = re.compile(r'^menu_files$')
+_P_MENU_CATEGORIES = re.compile(r'^menu_categories$')
+_P_MENU_DELETE = re.compile(r'^menu_delete$')
+# Browse (b:<token>), add files (a:<token>) and page (p:<token>:<page>) buttons of a category
+_P_CATEGORY_BUTTON = re.compile(r'^(?P<action>[bap]):(?P<token>\d+)(?::(?P<page>\d+))?$')
+_P_DELETE = re.compile(r'^d:(?P<token>\d+)$')
+_P_CHOOSE_CATEGORY = re.compile(r'^c:(?P<token>\d+)$')
+_P_CREATE_CATEGORY = re.compile(r'^create_new_category$')
+_P_DONE = re.compile(r'^done$')
+_P_BACK_TO_CATEGORIES = re.compile(r'^back_to_categories$')
+
+# Static markup and texts, built once and shared by all handlers
+BOT_COMMANDS = (
+    BotCommand("start", "Start the bot"),
+    BotCommand("menu", "Open the main menu"),
+    BotCommand("files", "Browse your stored files"),
+    BotCommand("categories", "Manage your categories"),
+    BotCommand("delete", "Delete a category"),
+    BotCommand("help", "Show help information"),
+)
+
+MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📂 Browse Files", callback_data='menu_files'),
+        InlineKeyboardButton("📁 Categories", callback_data='menu_categories')
+    ],
+    [
+        InlineKeyboardButton("❓ Help", callback_data='help'),
+        InlineKeyboardButton("🗑 Delete Category", callback_data='menu_delete')
     ]
-    return InlineKeyboardMarkup(keyboard)
+])
+
+BACK_TO_MENU_BUTTON = InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')
+BACK_TO_MENU_MARKUP = InlineKeyboardMarkup([[BACK_TO_MENU_BUTTON]])
+
+UPLOAD_CONFIRMATION_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✅ Done", callback_data='done')],
+    [InlineKeyboardButton("« Back to Categories", callback_data='back_to_categories')]
+])
+
+HELP_TEXT = (
+    '📚 *STORAGE BOT HELP GUIDE*\n\n'
+    '🤖 *ABOUT THIS BOT*\n'
+    'This bot helps you store and organize files into categories so you can access them anytime.\n\n'
+    
+    '📋 *COMMANDS*\n'
+    '• `/start` - Start the bot and see the welcome message\n'
+    '• `/menu` - Open the main menu with all options\n'
+    '• `/files` - Browse all your stored files by category\n'
+    '• `/categories` - Manage your file categories\n'
+    '• `/delete` - Delete unwanted categories\n'
+    '• `/help` - Show this help information\n\n'
+    
+    '📁 *STORING FILES*\n'
+    '1. Send any file (photo, video, document, audio) to the bot\n'
+    '2. Select an existing category or create a new one\n'
+    '3. The file will be stored in that category for later access\n'
+    '4. You can send multiple files in sequence to the same category\n\n'
+    
+    '🔍 *BROWSING & RETRIEVING FILES*\n'
+    '1. Use `/files` or the "Browse Files" button\n'
+    '2. Select a category to view its files\n'
+    '3. Files will be displayed in pages of 10 items\n'
+    '4. Use the navigation buttons to move between pages\n'
+    '5. Use the "Add Files" button to upload more files to the current category\n\n'
+    
+    '📊 *MANAGING CATEGORIES*\n'
+    '• Create: Use "Create New Category" or send files to a new category\n'
+    '• Browse: Use `/files` to see all your categories with file counts\n'
+    '• Delete: Use `/delete` to remove unwanted categories\n\n'
+    
+    '⚠️ *IMPORTANT NOTES*\n'
+    '• Files are securely stored on Telegram servers\n'
+    '• There may be a short delay when first messaging the bot after inactivity\n'
+    '• Send /start anytime to restart the conversation\n\n'
+    
+    'Need more help? Contact the developer @azharsayzz'
+)
 
-def start_command(update: Update, context: CallbackContext) -> int:
+class ChatUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently across chats, but one at a time within a chat.
+    
+    This keeps a slow handler for one user from delaying everyone else, while
+    a single user's button presses and uploads are still handled in order.
+    """
+    
+    def __init__(self, max_concurrent_updates: int):
+        # The base class takes its semaphore before do_process_update, so updates
+        # waiting for a busy chat would hold slots other chats need. Leave it
+        # effectively unbounded and apply the limit here, after the chat's lock.
+        super().__init__(sys.maxsize)
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        # Locks are dropped automatically once no update of that chat holds them
+        self._chat_locks = weakref.WeakValueDictionary()
+    
+    async def do_process_update(self, update, coroutine) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._slots:
+                await coroutine
+            return
+        
+        lock = self._chat_locks.get(chat.id)
+        if lock is None:
+            lock = self._chat_locks[chat.id] = asyncio.Lock()
+        async with lock, self._slots:
+            await coroutine
+    
+    async def initialize(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        pass
+
+async def set_bot_commands(application: Application) -> None:
+    """Set the bot commands menu in Telegram, unless it is already up to date."""
+    current = await application.bot.get_my_commands()
+    if tuple(current) != BOT_COMMANDS:
+        await application.bot.set_my_commands(BOT_COMMANDS)
+
+async def post_init(application: Application) -> None:
+    """Log bot information and set up the commands menu once the bot is initialized."""
+    # Blocking database calls run in the default executor; size it for many concurrent users
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    )
+    
+    bot_info = application.bot
+    logger.info(f"Bot connected successfully: @{bot_info.username} (ID: {bot_info.id})")
+    
+    # Set up the commands menu
+    try:
+        await set_bot_commands(application)
+        logger.info("Bot commands set successfully")
+    except Exception as e:
+        logger.error(f"Failed to set bot commands: {e}")
+
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start the conversation and ask for user's choice."""
     user = update.effective_user
     
@@ -72,247 +226,189 @@ def start_command(update: Update, context: CallbackContext) -> int:
         f"Ready to get started? Choose an option below or simply send me any file!"
     )
     
-    update.message.reply_text(
+    await update.message.reply_text(
         welcome_message,
         parse_mode='Markdown',
-        reply_markup=get_main_menu_keyboard()
+        reply_markup=MAIN_MENU_MARKUP
     )
     
     return MAIN_MENU
 
-def show_menu(update: Update, context: CallbackContext) -> None:
+async def show_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show the main menu."""
     query = update.callback_query
     
     # Handle both command and callback query
     if query:
-        query.answer()
-        query.edit_message_text(
+        await query.answer()
+        await query.edit_message_text(
             text="📱 *Main Menu*\n\nWhat would you like to do?",
-            reply_markup=get_main_menu_keyboard(),
+            reply_markup=MAIN_MENU_MARKUP,
             parse_mode='Markdown'
         )
     else:
-        update.message.reply_text(
+        await update.message.reply_text(
             text="📱 *Main Menu*\n\nWhat would you like to do?",
-            reply_markup=get_main_menu_keyboard(),
+            reply_markup=MAIN_MENU_MARKUP,
             parse_mode='Markdown'
         )
     
     return MAIN_MENU
 
-def handle_menu_selection(update: Update, context: CallbackContext) -> int:
-    """Handle menu button selection."""
-    query = update.callback_query
-    query.answer()
-    
-    action = query.data.replace('menu_', '')
-    
-    if action == 'files':
-        return browse_files_from_query(update, context)
-    elif action == 'categories':
-        return show_categories_from_query(update, context)
-    elif action == 'delete':
-        return delete_categories_from_query(update, context)
-    else:
-        # Default action
-        return MAIN_MENU
+async def handle_menu_files(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle the "Browse Files" menu button."""
+    await update.callback_query.answer()
+    return await browse_files_from_query(update, context)
+
+async def handle_menu_categories(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle the "Categories" menu button."""
+    await update.callback_query.answer()
+    return await show_categories_from_query(update, context)
+
+async def handle_menu_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle the "Delete Category" menu button."""
+    await update.callback_query.answer()
+    return await delete_categories_from_query(update, context)
 
-def help_command(update: Update, context: CallbackContext) -> None:
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /help is issued."""
-    help_text = (
-        '📚 *STORAGE BOT HELP GUIDE*\n\n'
-        '🤖 *ABOUT THIS BOT*\n'
-        'This bot helps you store and organize files into categories so you can access them anytime.\n\n'
-        
-        '📋 *COMMANDS*\n'
-        '• `/start` - Start the bot and see the welcome message\n'
-        '• `/menu` - Open the main menu with all options\n'
-        '• `/files` - Browse all your stored files by category\n'
-        '• `/categories` - Manage your file categories\n'
-        '• `/delete` - Delete unwanted categories\n'
-        '• `/help` - Show this help information\n\n'
-        
-        '📁 *STORING FILES*\n'
-        '1. Send any file (photo, video, document, audio) to the bot\n'
-        '2. Select an existing category or create a new one\n'
-        '3. The file will be stored in that category for later access\n'
-        '4. You can send multiple files in sequence to the same category\n\n'
-        
-        '🔍 *BROWSING & RETRIEVING FILES*\n'
-        '1. Use `/files` or the "Browse Files" button\n'
-        '2. Select a category to view its files\n'
-        '3. Files will be displayed in pages of 10 items\n'
-        '4. Use the navigation buttons to move between pages\n'
-        '5. Use the "Add Files" button to upload more files to the current category\n\n'
-        
-        '📊 *MANAGING CATEGORIES*\n'
-        '• Create: Use "Create New Category" or send files to a new category\n'
-        '• Browse: Use `/files` to see all your categories with file counts\n'
-        '• Delete: Use `/delete` to remove unwanted categories\n\n'
-        
-        '⚠️ *IMPORTANT NOTES*\n'
-        '• Files are securely stored on Telegram servers\n'
-        '• There may be a short delay when first messaging the bot after inactivity\n'
-        '• Send /start anytime to restart the conversation\n\n'
-        
-        'Need more help? Contact the developer @azharsayzz'
-    )
-    
-    update.message.reply_text(
-        help_text,
+    await update.message.reply_text(
+        HELP_TEXT,
         parse_mode='Markdown',
-        reply_markup=get_main_menu_keyboard()
+        reply_markup=MAIN_MENU_MARKUP
     )
 
-def help_from_query(update: Update, context: CallbackContext) -> int:
+async def help_from_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show help from a callback query."""
     query = update.callback_query
-    
-    help_text = (
-        '📚 *STORAGE BOT HELP GUIDE*\n\n'
-        '🤖 *ABOUT THIS BOT*\n'
-        'This bot helps you store and organize files into categories so you can access them anytime.\n\n'
-        
-        '📋 *COMMANDS*\n'
-        '• `/start` - Start the bot and see the welcome message\n'
-        '• `/menu` - Open the main menu with all options\n'
-        '• `/files` - Browse all your stored files by category\n'
-        '• `/categories` - Manage your file categories\n'
-        '• `/delete` - Delete unwanted categories\n'
-        '• `/help` - Show this help information\n\n'
-        
-        '📁 *STORING FILES*\n'
-        '1. Send any file (photo, video, document, audio) to the bot\n'
-        '2. Select an existing category or create a new one\n'
-        '3. The file will be stored in that category for later access\n'
-        '4. You can send multiple files in sequence to the same category\n\n'
-        
-        '🔍 *BROWSING & RETRIEVING FILES*\n'
-        '1. Use `/files` or the "Browse Files" button\n'
-        '2. Select a category to view its files\n'
-        '3. Files will be displayed in pages of 10 items\n'
-        '4. Use the navigation buttons to move between pages\n'
-        '5. Use the "Add Files" button to upload more files to the current category\n\n'
-        
-        '📊 *MANAGING CATEGORIES*\n'
-        '• Create: Use "Create New Category" or send files to a new category\n'
-        '• Browse: Use `/files` to see all your categories with file counts\n'
-        '• Delete: Use `/delete` to remove unwanted categories\n\n'
-        
-        '⚠️ *IMPORTANT NOTES*\n'
-        '• Files are securely stored on Telegram servers\n'
-        '• There may be a short delay when first messaging the bot after inactivity\n'
-        '• Send /start anytime to restart the conversation\n\n'
-        
-        'Need more help? Contact the developer @azharsayzz'
-    )
-    
-    query.edit_message_text(
-        help_text,
+    await query.edit_message_text(
+        HELP_TEXT,
         parse_mode='Markdown',
-        reply_markup=get_main_menu_keyboard()
+        reply_markup=MAIN_MENU_MARKUP
     )
     return MAIN_MENU
 
-def get_back_to_menu_button():
-    """Get a keyboard with just a back button."""
-    return InlineKeyboardMarkup([[InlineKeyboardButton("« Back to Menu", callback_data="back_to_menu")]])
-
-def show_categories_from_query(update: Update, context: CallbackContext) -> int:
-    """Show categories from a callback query."""
+async def _reply(update: Update, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """Edit the callback query message, or reply to the message if there is no query."""
     query = update.callback_query
-    user_id = update.effective_user.id
-    categories = db.get_user_categories(user_id)
-    
+    if query:
+        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+    else:
+        await update.message.reply_text(text, reply_markup=reply_markup, parse_mode='Markdown')
+
+def _category_token(context: ContextTypes.DEFAULT_TYPE, user_id: int, category: str) -> int:
+    """Return the short numeric token used in callback data for a user's category."""
+    tokens = context.bot_data.setdefault('cat_id', {})
+    key = (user_id, category)
+    token = tokens.get(key)
+    if token is None:
+        names = context.bot_data.setdefault('cat_name', {})
+        token = len(names)
+        tokens[key] = token
+        names[token] = key
+    return token
+
+def _category_name(context: ContextTypes.DEFAULT_TYPE, user_id: int, token: str) -> Optional[str]:
+    """Resolve a callback data token back to the user's category name, or None if unknown."""
+    try:
+        owner, category = context.bot_data.get('cat_name', {})[int(token)]
+    except (KeyError, ValueError):
+        return None
+    return category if owner == user_id else None
+
+async def _expired_menu(query) -> int:
+    """Tell the user the pressed button is stale and show the main menu instead."""
+    await query.edit_message_text(
+        "⌛ This menu has expired.\n\nWhat would you like to do?",
+        reply_markup=MAIN_MENU_MARKUP
+    )
+    return MAIN_MENU
+
+async def _categories_markup(context: ContextTypes.DEFAULT_TYPE, user_id: int, categories: list, callback_prefix: str,
+                             with_counts: bool = False, create: bool = True, back: bool = True) -> InlineKeyboardMarkup:
+    """Build the keyboard listing the user's categories, optionally with file counts."""
     buttons = []
-    # Add existing categories
-    for category in categories:
-        buttons.append([InlineKeyboardButton(category, callback_data=f'category_{category}')])
+    if with_counts:
+        counts = await db.get_category_counts_async(user_id)
+        for category in categories:
+            token = _category_token(context, user_id, category)
+            buttons.append([InlineKeyboardButton(f"{category} ({counts.get(category, 0)})", callback_data=f'{callback_prefix}:{token}')])
+    else:
+        for category in categories:
+            token = _category_token(context, user_id, category)
+            buttons.append([InlineKeyboardButton(category, callback_data=f'{callback_prefix}:{token}')])
     
     # Add option to create a new category
-    buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
+    if create:
+        buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
     
     # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
-    
-    reply_markup = InlineKeyboardMarkup(buttons)
+    if back:
+        buttons.append([BACK_TO_MENU_BUTTON])
     
-    query.edit_message_text(
-        '📋 *Your Categories*\n\nSelect a category or create a new one:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
-    )
-    
-    return CHOOSING_CATEGORY
+    return InlineKeyboardMarkup(buttons)
 
-def show_categories(update: Update, context: CallbackContext) -> int:
+async def show_categories(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show the user's categories and option to create a new one."""
     user_id = update.effective_user.id
-    categories = db.get_user_categories(user_id)
-    
-    buttons = []
-    # Add existing categories
-    for category in categories:
-        buttons.append([InlineKeyboardButton(category, callback_data=f'category_{category}')])
-    
-    # Add option to create a new category
-    buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
+    categories = await db.get_user_categories_async(user_id)
     
-    # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
-    
-    reply_markup = InlineKeyboardMarkup(buttons)
-    
-    update.message.reply_text(
+    await _reply(
+        update,
         '📋 *Your Categories*\n\nSelect a category or create a new one:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        await _categories_markup(context, user_id, categories, 'c')
     )
-    
     return CHOOSING_CATEGORY
 
-def handle_category_selection(update: Update, context: CallbackContext) -> int:
-    """Handle category selection from inline keyboard."""
+async def show_categories_from_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Show categories from a callback query."""
+    return await show_categories(update, context)
+
+async def ask_category_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Ask the user for the name of a new category."""
     query = update.callback_query
-    query.answer()
-    
-    if query.data == 'back_to_menu':
-        return show_menu(update, context)
+    await query.answer()
     
-    if query.data == 'create_new_category':
-        query.edit_message_text(
-            text="✏️ *New Category*\n\nPlease send me the name for your new category:",
-            parse_mode='Markdown',
-            reply_markup=get_back_to_menu_button()
-        )
-        return WAITING_FOR_CATEGORY_NAME
+    await query.edit_message_text(
+        text="✏️ *New Category*\n\nPlease send me the name for your new category:",
+        parse_mode='Markdown',
+        reply_markup=BACK_TO_MENU_MARKUP
+    )
+    return WAITING_FOR_CATEGORY_NAME
+
+async def handle_category_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle category selection from inline keyboard."""
+    query = update.callback_query
+    await query.answer()
     
     # User selected an existing category
-    category_name = query.data.replace('category_', '')
+    token = context.matches[0].group('token')
+    category_name = _category_name(context, update.effective_user.id, token)
+    if category_name is None:
+        return await _expired_menu(query)
     context.user_data['current_category'] = category_name
     
-    query.edit_message_text(
+    await query.edit_message_text(
         text=f"📁 *Category: {category_name}*\n\n"
              f"Send me files to add to this category, or use the buttons below.",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("📂 View Files", callback_data=f'browse_{category_name}')],
+            [InlineKeyboardButton("📂 View Files", callback_data=f'b:{token}')],
             [InlineKeyboardButton("✅ Done", callback_data='done')],
             [InlineKeyboardButton("« Back to Categories", callback_data='back_to_categories')]
         ])
     )
     return CHOOSING_FILE
 
-def create_new_category(update: Update, context: CallbackContext) -> int:
+async def create_new_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Create a new category with the name provided by the user."""
     user_id = update.effective_user.id
     category_name = update.message.text.strip()
     
     # Create the new category
-    db.create_category(user_id, category_name)
+    await db.create_category_async(user_id, category_name)
     
-    update.message.reply_text(
+    await update.message.reply_text(
         f"✅ Category '*{category_name}*' created successfully!\n\n"
         f"Send me files to add to this category, or use the buttons below.",
         parse_mode='Markdown',
@@ -325,7 +421,55 @@ def create_new_category(update: Update, context: CallbackContext) -> int:
     context.user_data['current_category'] = category_name
     return CHOOSING_FILE
 
-def save_file(update: Update, context: CallbackContext) -> int:
+def _confirmation_text(files_uploaded: int, category: str) -> str:
+    """Return the text of the upload confirmation message."""
+    return (
+        f"✅ *{files_uploaded} file(s) saved* to category '*{category}*'!\n\n"
+        "Send more files or use the buttons below."
+    )
+
+async def _flush_confirmation(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+    """Update the upload confirmation once the current burst of uploads has settled."""
+    await asyncio.sleep(CONFIRMATION_EDIT_DELAY)
+    context.chat_data['edit_pending'] = False
+    
+    # The upload session may have ended while we were waiting
+    message_id = context.user_data.get('last_confirmation_message_id')
+    category = context.user_data.get('current_category')
+    if not message_id or not category:
+        return
+    
+    confirmation_text = _confirmation_text(context.user_data.get('files_uploaded', 0), category)
+    try:
+        # Try to edit the existing confirmation message
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=confirmation_text,
+            parse_mode='Markdown',
+            reply_markup=UPLOAD_CONFIRMATION_MARKUP
+        )
+    except Exception as e:
+        logger.error(f"Error updating confirmation message: {e}")
+        # If editing fails, send a new message and track its ID
+        sent_message = await context.bot.send_message(
+            chat_id=chat_id,
+            text=confirmation_text,
+            parse_mode='Markdown',
+            reply_markup=UPLOAD_CONFIRMATION_MARKUP
+        )
+        context.user_data['last_confirmation_message_id'] = sent_message.message_id
+
+def _schedule_confirmation_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Schedule an update of the upload confirmation, coalescing a burst of uploads into one edit."""
+    if not context.chat_data.get('edit_pending'):
+        context.chat_data['edit_pending'] = True
+        context.application.create_task(
+            _flush_confirmation(context, update.effective_chat.id),
+            update=update
+        )
+
+async def save_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Save a file to the selected category."""
     user_id = update.effective_user.id
     message = update.message
@@ -335,22 +479,12 @@ def save_file(update: Update, context: CallbackContext) -> int:
         category = context.user_data['current_category']
     else:
         # If not in a flow, show categories to select from
-        keyboard = []
-        categories = db.get_user_categories(user_id)
-        
-        # Create inline keyboard with categories
-        buttons = []
-        for category in categories:
-            buttons.append([InlineKeyboardButton(category, callback_data=f'category_{category}')])
-        
-        buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
-        
-        reply_markup = InlineKeyboardMarkup(buttons)
+        categories = await db.get_user_categories_async(user_id)
         
-        update.message.reply_text(
+        await update.message.reply_text(
             '📂 *Store File*\n\nPlease select a category for this file:',
             parse_mode='Markdown',
-            reply_markup=reply_markup
+            reply_markup=await _categories_markup(context, user_id, categories, 'c', back=False)
         )
         
         # Save the message ID so we can forward it later
@@ -358,305 +492,202 @@ def save_file(update: Update, context: CallbackContext) -> int:
         context.user_data['pending_file_chat_id'] = update.message.chat.id
         return CHOOSING_CATEGORY
     
-    # Forward the message to the channel
-    channel_id = os.getenv("CHANNEL_ID")
-    forwarded_msg = message.forward(chat_id=channel_id)
+    # Copy the message to the channel
+    stored_msg = await message.copy(chat_id=CHANNEL_ID)
     
     # Determine the file type
-    file_type = None
+    file_type = "unknown"
     file_name = None
-    
-    if message.photo:
-        file_type = "photo"
-    elif message.video:
-        file_type = "video"
-        if message.video.file_name:
-            file_name = message.video.file_name
-    elif message.document:
-        file_type = "document"
-        if message.document.file_name:
-            file_name = message.document.file_name
-    elif message.audio:
-        file_type = "audio"
-        if message.audio.file_name:
-            file_name = message.audio.file_name
-    elif message.voice:
-        file_type = "voice"
-    elif message.animation:
-        file_type = "animation"
-        if message.animation.file_name:
-            file_name = message.animation.file_name
-    else:
-        file_type = "unknown"
-    
-    # Save file info to the database
-    db.add_file_to_category(
-        user_id=user_id,
-        category=category,
-        message_id=forwarded_msg.message_id,
-        file_type=file_type,
-        file_name=file_name
-    )
+    file_id = None
+    
+    for attr, name_attr in TYPE_PROBES:
+        media = getattr(message, attr)
+        if media:
+            file_type = attr
+            if attr == 'photo':
+                # Photos come as a list of sizes; keep the largest
+                media = media[-1]
+            file_id = media.file_id
+            if name_attr:
+                file_name = getattr(media, name_attr) or None
+            break
     
     # Track number of files uploaded in this session
     if 'files_uploaded' not in context.user_data:
         context.user_data['files_uploaded'] = 0
     context.user_data['files_uploaded'] += 1
     
-    # Update existing confirmation message if it exists, otherwise send a new one
-    confirmation_text = f"✅ *{context.user_data['files_uploaded']} file(s) saved* to category '*{category}*'!\n\n"
-    confirmation_text += f"Send more files or use the buttons below."
-    
-    reply_markup = InlineKeyboardMarkup([
-        [InlineKeyboardButton("✅ Done", callback_data='done')],
-        [InlineKeyboardButton("« Back to Categories", callback_data='back_to_categories')]
-    ])
-    
-    if 'last_confirmation_message_id' in context.user_data and context.user_data['last_confirmation_message_id']:
-        try:
-            # Try to edit the existing confirmation message
-            context.bot.edit_message_text(
-                chat_id=update.effective_chat.id,
-                message_id=context.user_data['last_confirmation_message_id'],
-                text=confirmation_text,
-                parse_mode='Markdown',
-                reply_markup=reply_markup
-            )
-            return CHOOSING_FILE
-        except Exception as e:
-            logger.error(f"Error updating confirmation message: {e}")
-            # If editing fails, we'll send a new message below
-    
-    # Send a new confirmation message and track its ID
-    sent_message = update.message.reply_text(
-        confirmation_text,
-        parse_mode='Markdown',
-        reply_markup=reply_markup
-    )
-    context.user_data['last_confirmation_message_id'] = sent_message.message_id
-    
-    return CHOOSING_FILE
-
-def handle_file_menu(update: Update, context: CallbackContext) -> int:
-    """Handle menu actions in file selection mode."""
-    query = update.callback_query
-    query.answer()
-    
-    if query.data == 'done':
-        if 'current_category' in context.user_data:
-            del context.user_data['current_category']
-        
-        # Reset file upload counter
-        if 'files_uploaded' in context.user_data:
-            del context.user_data['files_uploaded']
-        
-        # Clear last confirmation message ID
-        if 'last_confirmation_message_id' in context.user_data:
-            del context.user_data['last_confirmation_message_id']
+    async def send_confirmation():
+        if context.user_data.get('last_confirmation_message_id'):
+            # Edit the existing confirmation instead
+            _schedule_confirmation_edit(update, context)
+            return
         
-        query.edit_message_text(
-            "✅ *Done!*\n\nWhat would you like to do next?",
+        # Send a new confirmation message and track its ID
+        sent_message = await update.message.reply_text(
+            _confirmation_text(context.user_data['files_uploaded'], category),
             parse_mode='Markdown',
-            reply_markup=get_main_menu_keyboard()
+            reply_markup=UPLOAD_CONFIRMATION_MARKUP
         )
-        return MAIN_MENU
+        context.user_data['last_confirmation_message_id'] = sent_message.message_id
+    
+    # Save file info to the database while the confirmation is being sent
+    save_result, confirmation_result = await asyncio.gather(
+        db.add_file_to_category_async(
+            user_id=user_id,
+            category=category,
+            message_id=stored_msg.message_id,
+            file_type=file_type,
+            file_name=file_name,
+            file_id=file_id
+        ),
+        send_confirmation(),
+        return_exceptions=True
+    )
     
-    elif query.data == 'back_to_categories':
-        # Remove current category
-        if 'current_category' in context.user_data:
-            del context.user_data['current_category']
-        
-        # Reset file upload counter
-        if 'files_uploaded' in context.user_data:
-            del context.user_data['files_uploaded']
-        
-        # Clear last confirmation message ID
-        if 'last_confirmation_message_id' in context.user_data:
-            del context.user_data['last_confirmation_message_id']
-        
-        # Show categories
-        return show_categories_from_query(update, context)
+    if isinstance(save_result, Exception):
+        logger.error(f"Error saving file to category '{category}' for user {user_id}: {save_result}")
+        # The file isn't stored: take it back out of the count the confirmation shows
+        context.user_data['files_uploaded'] = max(0, context.user_data.get('files_uploaded', 1) - 1)
+        if context.user_data.get('last_confirmation_message_id'):
+            _schedule_confirmation_edit(update, context)
+        await update.message.reply_text(
+            f"❌ Failed to save this file to category '*{category}*'. Please send it again.",
+            parse_mode='Markdown'
+        )
+    elif isinstance(save_result, BaseException):
+        raise save_result
     
-    # Handle "Back to Browse" button
-    elif query.data.startswith('browse_'):
-        category_name = query.data.replace('browse_', '')
-        
-        # Reset file upload counter
-        if 'files_uploaded' in context.user_data:
-            del context.user_data['files_uploaded']
-        
-        # Clear last confirmation message ID
-        if 'last_confirmation_message_id' in context.user_data:
-            del context.user_data['last_confirmation_message_id']
-        
-        # Go back to browsing the category
-        return handle_browse_selection(update, context)
+    if isinstance(confirmation_result, BaseException):
+        raise confirmation_result
     
     return CHOOSING_FILE
 
-def done(update: Update, context: CallbackContext) -> int:
-    """Exit the conversation."""
-    if 'current_category' in context.user_data:
-        del context.user_data['current_category']
-    
-    # Reset file upload counter
-    if 'files_uploaded' in context.user_data:
-        del context.user_data['files_uploaded']
+def _reset_upload_state(user_data: dict) -> None:
+    """End the current upload session: forget the category, counter and confirmation message."""
+    for key in _UPLOAD_KEYS:
+        user_data.pop(key, None)
+
+async def handle_done_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle the "Done" button in file selection mode."""
+    query = update.callback_query
+    await query.answer()
     
-    # Clear last confirmation message ID
-    if 'last_confirmation_message_id' in context.user_data:
-        del context.user_data['last_confirmation_message_id']
+    _reset_upload_state(context.user_data)
     
-    update.message.reply_text(
+    await query.edit_message_text(
         "✅ *Done!*\n\nWhat would you like to do next?",
         parse_mode='Markdown',
-        reply_markup=get_main_menu_keyboard()
+        reply_markup=MAIN_MENU_MARKUP
     )
-    
     return MAIN_MENU
 
-def browse_files_from_query(update: Update, context: CallbackContext) -> int:
-    """Browse files by category from a callback query."""
-    query = update.callback_query
-    user_id = update.effective_user.id
-    categories = db.get_user_categories(user_id)
-    
-    if not categories:
-        # If no categories exist, suggest creating one
-        query.edit_message_text(
-            "📂 *Browse Files*\n\nYou don't have any categories yet. Would you like to create one?",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')],
-                [InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')]
-            ])
-        )
-        return CHOOSING_CATEGORY
-    
-    buttons = []
-    for category in categories:
-        # Get file count for this category
-        files = db.get_files_in_category(user_id, category)
-        file_count = len(files)
-        buttons.append([InlineKeyboardButton(f"{category} ({file_count})", callback_data=f'browse_{category}')])
+async def handle_back_to_categories(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle the "Back to Categories" button in file selection mode."""
+    await update.callback_query.answer()
     
-    # Add option to create a new category
-    buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
-    
-    # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
+    _reset_upload_state(context.user_data)
     
-    reply_markup = InlineKeyboardMarkup(buttons)
+    # Show categories
+    return await show_categories_from_query(update, context)
+
+async def done(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Exit the conversation."""
+    _reset_upload_state(context.user_data)
     
-    query.edit_message_text(
-        '📂 *Browse Files*\n\nSelect a category to view files:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+    await update.message.reply_text(
+        "✅ *Done!*\n\nWhat would you like to do next?",
+        parse_mode='Markdown',
+        reply_markup=MAIN_MENU_MARKUP
     )
     
     return MAIN_MENU
 
-def browse_files(update: Update, context: CallbackContext) -> None:
+async def browse_files(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Browse files by category."""
     user_id = update.effective_user.id
-    categories = db.get_user_categories(user_id)
+    categories = await db.get_user_categories_async(user_id)
     
     if not categories:
         # If no categories exist, suggest creating one
-        update.message.reply_text(
+        await _reply(
+            update,
             "📂 *Browse Files*\n\nYou don't have any categories yet. Would you like to create one?",
-            parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')],
-                [InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')]
-            ])
+            await _categories_markup(context, user_id, categories, 'b')
         )
         return CHOOSING_CATEGORY
     
-    buttons = []
-    for category in categories:
-        # Get file count for this category
-        files = db.get_files_in_category(user_id, category)
-        file_count = len(files)
-        buttons.append([InlineKeyboardButton(f"{category} ({file_count})", callback_data=f'browse_{category}')])
-    
-    # Add option to create a new category
-    buttons.append([InlineKeyboardButton("➕ Create New Category", callback_data='create_new_category')])
-    
-    # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
-    
-    reply_markup = InlineKeyboardMarkup(buttons)
-    
-    update.message.reply_text(
+    await _reply(
+        update,
         '📂 *Browse Files*\n\nSelect a category to view files:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        await _categories_markup(context, user_id, categories, 'b', with_counts=True)
     )
-    
     return MAIN_MENU
 
-def handle_browse_selection(update: Update, context: CallbackContext) -> None:
-    """Handle browse category selection from inline keyboard."""
-    query = update.callback_query
-    query.answer()
-    
-    if query.data == 'back_to_menu':
-        return show_menu(update, context)
-    
-    # Check if this is an add files action
-    if query.data.startswith('add_files_'):
-        category_name = query.data.replace('add_files_', '')
-        return handle_add_files_to_category(update, context, category_name)
-    
-    # Check if this is a pagination request
-    if query.data.startswith('page_'):
-        # Extract category name and page number
-        _, category_name, page = query.data.split('_')
-        page = int(page)
-        show_files_page(update, context, category_name, page)
-        return
-    
-    category_name = query.data.replace('browse_', '')
-    show_files_page(update, context, category_name, 1)  # Start with page 1
+async def browse_files_from_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Browse files by category from a callback query."""
+    return await browse_files(update, context)
 
-def handle_add_files_to_category(update: Update, context: CallbackContext, category_name: str) -> int:
+async def _matched_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Optional[str]:
+    """Answer the callback query and resolve the category token captured by its pattern."""
+    await update.callback_query.answer()
+    return _category_name(context, update.effective_user.id, context.matches[0].group('token'))
+
+async def handle_category_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Optional[int]:
+    """Handle the browse, page and add files buttons of a category."""
+    match = context.matches[0]
+    if match.group('action') == 'a':
+        return await handle_add_files_to_category(update, context)
+    
+    category_name = await _matched_category(update, context)
+    if category_name is None:
+        return await _expired_menu(update.callback_query)
+    
+    # Browsing starts on page 1
+    await show_files_page(update, context, category_name, int(match.group('page') or 1))
+
+async def handle_add_files_to_category(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle adding files to a specific category."""
     query = update.callback_query
+    category_name = await _matched_category(update, context)
+    if category_name is None:
+        return await _expired_menu(query)
     
     # Set current category in context for file uploads
     context.user_data['current_category'] = category_name
+    token = _category_token(context, update.effective_user.id, category_name)
     
-    query.edit_message_text(
+    await query.edit_message_text(
         text=f"📂 *Adding Files to: {category_name}*\n\n"
              f"Send me files to add to this category. They will be automatically saved to '{category_name}'.\n\n"
              f"You can send multiple files in sequence.",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup([
             [InlineKeyboardButton("✅ Done", callback_data='done')],
-            [InlineKeyboardButton("« Back to Browse", callback_data=f'browse_{category_name}')]
+            [InlineKeyboardButton("« Back to Browse", callback_data=f'b:{token}')]
         ])
     )
     return CHOOSING_FILE
 
-def show_files_page(update: Update, context: CallbackContext, category_name: str, page: int) -> None:
+async def show_files_page(update: Update, context: ContextTypes.DEFAULT_TYPE, category_name: str, page: int) -> None:
     """Show files for a specific page of a category."""
     query = update.callback_query
     user_id = update.effective_user.id
+    token = _category_token(context, user_id, category_name)
     
     # Get files with pagination
-    files, total_pages, total_files = db.get_files_in_category_paginated(
+    files, total_pages, total_files = await db.get_files_in_category_paginated_async(
         user_id, category_name, page, page_size=10
     )
     
     if not files:
-        query.edit_message_text(
+        await query.edit_message_text(
             text=f"📂 *Category: {category_name}*\n\nNo files in this category.",
             parse_mode='Markdown',
             reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("➕ Add Files", callback_data=f'add_files_{category_name}')],
+                [InlineKeyboardButton("➕ Add Files", callback_data=f'a:{token}')],
                 [InlineKeyboardButton("« Back to Categories", callback_data='menu_files')],
-                [InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')]
+                [BACK_TO_MENU_BUTTON]
             ])
         )
         return
@@ -668,167 +699,154 @@ def show_files_page(update: Update, context: CallbackContext, category_name: str
     if total_pages > 1:
         pag_buttons = []
         if page > 1:
-            pag_buttons.append(InlineKeyboardButton("« Prev", callback_data=f'page_{category_name}_{page-1}'))
+            pag_buttons.append(InlineKeyboardButton("« Prev", callback_data=f'p:{token}:{page-1}'))
         
         pag_buttons.append(InlineKeyboardButton(f"{page}/{total_pages}", callback_data=f'ignore'))
         
         if page < total_pages:
-            pag_buttons.append(InlineKeyboardButton("Next »", callback_data=f'page_{category_name}_{page+1}'))
+            pag_buttons.append(InlineKeyboardButton("Next »", callback_data=f'p:{token}:{page+1}'))
         
         nav_buttons.append(pag_buttons)
     
     # Add "Add Files" button
-    nav_buttons.append([InlineKeyboardButton("➕ Add Files", callback_data=f'add_files_{category_name}')])
+    nav_buttons.append([InlineKeyboardButton("➕ Add Files", callback_data=f'a:{token}')])
     
     # Add back buttons
     nav_buttons.append([InlineKeyboardButton("« Back to Categories", callback_data='menu_files')])
-    nav_buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
+    nav_buttons.append([BACK_TO_MENU_BUTTON])
     
     # Display page information
     start_idx = (page - 1) * 10 + 1
-    page_info = f"📂 *Category: {category_name}*\n\n"
-    page_info += f"Showing files {start_idx}-{start_idx + len(files) - 1} of {total_files}\n"
-    page_info += f"Page {page} of {total_pages}\n\n"
-    page_info += "Sending files...\n"
+    page_info = (
+        f"📂 *Category: {category_name}*\n\n"
+        f"Showing files {start_idx}-{start_idx + len(files) - 1} of {total_files}\n"
+        f"Page {page} of {total_pages}\n\n"
+        "Sending files...\n"
+    )
     
-    query.edit_message_text(
+    await query.edit_message_text(
         text=page_info,
         parse_mode='Markdown'
     )
     
-    # Copy each file from the channel to the user with numbering
-    channel_id = os.getenv("CHANNEL_ID")
-    
+    # Create a caption for each file with its number
+    captions = []
     for i, file_info in enumerate(files):
-        try:
-            # Create a caption with the file number
-            file_number = start_idx + i
-            file_caption = f"File #{file_number} of {total_files}"
-            
-            # Add filename if available
-            if "file_name" in file_info:
-                file_caption += f"\nFilename: {file_info['file_name']}"
+        file_caption = f"File #{start_idx + i} of {total_files}"
+        
+        # Add filename if available
+        if "file_name" in file_info:
+            file_caption += f"\nFilename: {file_info['file_name']}"
+        captions.append(file_caption)
+    
+    # Split the page into runs of files that can be sent together as one album.
+    # Files stored without a file_id can only be copied from the channel.
+    batches = []
+    for i, file_info in enumerate(files):
+        group = MEDIA_GROUP_TYPES.get(file_info.get("file_type"))
+        kind = group[0] if group and file_info.get("file_id") else None
+        if kind and batches and batches[-1][0] == kind:
+            batches[-1][1].append(i)
+        else:
+            batches.append((kind, [i]))
+    
+    async def _send_batch(kind, indexes):
+        async with COPY_SEMAPHORE:
+            if kind and len(indexes) > 1:
+                return await context.bot.send_media_group(
+                    chat_id=update.effective_user.id,
+                    media=[
+                        MEDIA_GROUP_TYPES[files[i]["file_type"]][1](media=files[i]["file_id"], caption=captions[i])
+                        for i in indexes
+                    ]
+                )
             
             # Use copy_message with caption instead of forward_message
-            context.bot.copy_message(
+            return await context.bot.copy_message(
                 chat_id=update.effective_user.id,
-                from_chat_id=channel_id,
-                message_id=file_info["message_id"],
-                caption=file_caption
-            )
-        except Exception as e:
-            logger.error(f"Error copying message: {e}")
-            context.bot.send_message(
-                chat_id=update.effective_user.id,
-                text=f"Error retrieving file #{start_idx + i}: {e}"
+                from_chat_id=CHANNEL_ID,
+                message_id=files[indexes[0]]["message_id"],
+                caption=captions[indexes[0]]
             )
     
+    # Send the batches concurrently, bounded by the semaphore
+    results = await asyncio.gather(
+        *(_send_batch(kind, indexes) for kind, indexes in batches),
+        return_exceptions=True
+    )
+    
+    for (kind, indexes), result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error sending files: {result}")
+            for i in indexes:
+                await context.bot.send_message(
+                    chat_id=update.effective_user.id,
+                    text=f"Error retrieving file #{start_idx + i}: {result}"
+                )
+    
     # Send a follow-up message with navigation buttons
-    context.bot.send_message(
+    await context.bot.send_message(
         chat_id=update.effective_user.id,
         text=f"✅ Showing files {start_idx}-{start_idx + len(files) - 1} of {total_files} from *{category_name}*",
         parse_mode='Markdown',
         reply_markup=InlineKeyboardMarkup(nav_buttons)
     )
 
-def delete_category_command(update: Update, context: CallbackContext) -> None:
-    """Show categories to delete from the /delete command."""
+async def delete_category_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Show categories to delete from the /delete command or a callback query."""
     user_id = update.effective_user.id
-    categories = db.get_user_categories(user_id)
+    categories = await db.get_user_categories_async(user_id)
     
     if not categories:
-        update.message.reply_text(
+        await _reply(
+            update,
             "🗑 *Delete Category*\n\nYou don't have any categories to delete.",
-            parse_mode='Markdown',
-            reply_markup=get_main_menu_keyboard()
-        )
-        return
-    
-    buttons = []
-    for category in categories:
-        buttons.append([InlineKeyboardButton(category, callback_data=f'delete_{category}')])
-    
-    # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
-    
-    reply_markup = InlineKeyboardMarkup(buttons)
-    
-    update.message.reply_text(
-        '🗑 *Delete Category*\n\nSelect a category to delete:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
-    )
-
-def delete_categories_from_query(update: Update, context: CallbackContext) -> int:
-    """Show delete categories screen from a query callback."""
-    query = update.callback_query
-    user_id = update.effective_user.id
-    
-    # Get all categories for this user
-    categories = db.get_user_categories(user_id)
-    
-    if not categories:
-        query.edit_message_text(
-            "🗑 *Delete Category*\n\nYou don't have any categories to delete.",
-            parse_mode='Markdown',
-            reply_markup=get_main_menu_keyboard()
+            MAIN_MENU_MARKUP
         )
         return MAIN_MENU
     
-    buttons = []
-    for category in categories:
-        buttons.append([InlineKeyboardButton(category, callback_data=f'delete_{category}')])
-    
-    # Add back button
-    buttons.append([InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')])
-    
-    reply_markup = InlineKeyboardMarkup(buttons)
-    
-    query.edit_message_text(
+    await _reply(
+        update,
         '🗑 *Delete Category*\n\nSelect a category to delete:',
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        await _categories_markup(context, user_id, categories, 'd', create=False)
     )
-    
     return MAIN_MENU
 
-def handle_delete_selection(update: Update, context: CallbackContext) -> None:
+async def delete_categories_from_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Show delete categories screen from a query callback."""
+    return await delete_category_command(update, context)
+
+async def handle_delete_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle delete category selection."""
     query = update.callback_query
-    query.answer()
-    
-    if query.data == 'back_to_menu':
-        return show_menu(update, context)
+    category_name = await _matched_category(update, context)
+    if category_name is None:
+        return await _expired_menu(query)
     
-    category_name = query.data.replace('delete_', '')
     user_id = update.effective_user.id
     
     # Delete the category
-    success = db.delete_category(user_id, category_name)
+    success = await db.delete_category_async(user_id, category_name)
     
     if success:
-        query.edit_message_text(
+        await query.edit_message_text(
             text=f"✅ Category '*{category_name}*' has been deleted.",
             parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')]
-            ])
+            reply_markup=BACK_TO_MENU_MARKUP
         )
     else:
-        query.edit_message_text(
+        await query.edit_message_text(
             text=f"❌ Failed to delete category '*{category_name}*'.",
             parse_mode='Markdown',
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("« Back to Menu", callback_data='back_to_menu')]
-            ])
+            reply_markup=BACK_TO_MENU_MARKUP
         )
 
-def handle_text_input(update: Update, context: CallbackContext) -> None:
+async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle text input that's not part of a conversation."""
     # Show the menu as fallback
-    show_menu(update, context)
+    await show_menu(update, context)
 
-def handle_pending_file(update: Update, context: CallbackContext) -> int:
+async def handle_pending_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle the pending file after category selection."""
     if 'pending_file_id' in context.user_data and 'pending_file_chat_id' in context.user_data:
         # Try to forward the pending file from its original message
@@ -837,12 +855,12 @@ def handle_pending_file(update: Update, context: CallbackContext) -> int:
         
         try:
             # First, let the user know we're processing their file
-            update.callback_query.edit_message_text(
+            await update.callback_query.edit_message_text(
                 f"Processing your file to category '{context.user_data['current_category']}'..."
             )
             
             # Then ask them to send the file again
-            context.bot.send_message(
+            await context.bot.send_message(
                 chat_id=chat_id,
                 text=f"Please send the file again to save it to category '{context.user_data['current_category']}'."
             )
@@ -854,7 +872,7 @@ def handle_pending_file(update: Update, context: CallbackContext) -> int:
             return CHOOSING_FILE
         except Exception as e:
             logger.error(f"Error handling pending file: {e}")
-            context.bot.send_message(
+            await context.bot.send_message(
                 chat_id=chat_id,
                 text="There was an error processing your file. Please send it again."
             )
@@ -881,43 +899,47 @@ def main() -> None:
         run_health_server()
         logger.info("Health check server started")
     
-    # Create the Updater and pass it your bot's token
+    # Create the Application and pass it your bot's token
     bot_token = os.getenv("BOT_TOKEN")
     if not bot_token:
         logger.error("No BOT_TOKEN environment variable found! Exiting...")
         return
     
-    updater = Updater(bot_token)
-    
-    # Log bot information
-    try:
-        bot_info = updater.bot.get_me()
-        logger.info(f"Bot connected successfully: @{bot_info.username} (ID: {bot_info.id})")
-    except Exception as e:
-        logger.error(f"Failed to get bot information: {e}")
-        logger.error("Please check your BOT_TOKEN")
+    if not CHANNEL_ID:
+        logger.error("No CHANNEL_ID environment variable found! Exiting...")
         return
     
-    # Get the dispatcher to register handlers
-    dispatcher = updater.dispatcher
-    
-    # Set up the commands menu
-    try:
-        set_bot_commands(updater)
-        logger.info("Bot commands set successfully")
-    except Exception as e:
-        logger.error(f"Failed to set bot commands: {e}")
+    # HTTP/2 lets concurrent API calls share a connection instead of each opening its own
+    application = (
+        ApplicationBuilder()
+        .token(bot_token)
+        .concurrent_updates(ChatUpdateProcessor(max_concurrent_updates=256))
+        .request(HTTPXRequest(connection_pool_size=256, http_version="2", pool_timeout=10))
+        .get_updates_request(HTTPXRequest(connection_pool_size=16, http_version="2"))
+        .post_init(post_init)
+        .build()
+    )
     
     # Basic commands
-    dispatcher.add_handler(CommandHandler("start", start_command))
-    dispatcher.add_handler(CommandHandler("help", help_command))
-    dispatcher.add_handler(CommandHandler("menu", show_menu))
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("menu", show_menu))
     
     # File browsing
-    dispatcher.add_handler(CommandHandler("files", browse_files))
+    application.add_handler(CommandHandler("files", browse_files))
     
     # Category deletion
-    dispatcher.add_handler(CommandHandler("delete", delete_category_command))
+    application.add_handler(CommandHandler("delete", delete_category_command))
+    
+    # Main menu and category buttons, usable from the main menu and as entry points
+    menu_callbacks = [
+        CallbackQueryHandler(help_from_query, pattern=_P_HELP),
+        CallbackQueryHandler(handle_menu_files, pattern=_P_MENU_FILES),
+        CallbackQueryHandler(handle_menu_categories, pattern=_P_MENU_CATEGORIES),
+        CallbackQueryHandler(handle_menu_delete, pattern=_P_MENU_DELETE),
+        CallbackQueryHandler(handle_category_button, pattern=_P_CATEGORY_BUTTON),
+        CallbackQueryHandler(handle_delete_selection, pattern=_P_DELETE),
+    ]
     
     # Conversation handler for categories and file storage
     conv_handler = ConversationHandler(
@@ -925,41 +947,31 @@ def main() -> None:
             CommandHandler("categories", show_categories),
             CommandHandler("menu", show_menu),
             CommandHandler("files", browse_files),
-            CallbackQueryHandler(show_menu, pattern='^back_to_menu$'),
-            CallbackQueryHandler(help_from_query, pattern='^help$'),
-            CallbackQueryHandler(handle_menu_selection, pattern='^menu_'),
-            CallbackQueryHandler(handle_browse_selection, pattern='^browse_'),
-            CallbackQueryHandler(handle_browse_selection, pattern='^add_files_'),
-            CallbackQueryHandler(handle_browse_selection, pattern='^page_'),
-            CallbackQueryHandler(handle_delete_selection, pattern='^delete_'),
+            CallbackQueryHandler(show_menu, pattern=_P_BACK_TO_MENU),
+            *menu_callbacks,
             MessageHandler(
-                Filters.photo | Filters.video | Filters.document | 
-                Filters.audio | Filters.voice | Filters.animation,
+                filters.PHOTO | filters.VIDEO | filters.Document.ALL | 
+                filters.AUDIO | filters.VOICE | filters.ANIMATION,
                 save_file
             ),
         ],
         states={
-            MAIN_MENU: [
-                CallbackQueryHandler(help_from_query, pattern='^help$'),
-                CallbackQueryHandler(handle_menu_selection, pattern='^menu_'),
-                CallbackQueryHandler(handle_browse_selection, pattern='^browse_'),
-                CallbackQueryHandler(handle_browse_selection, pattern='^add_files_'),
-                CallbackQueryHandler(handle_browse_selection, pattern='^page_'),
-                CallbackQueryHandler(handle_delete_selection, pattern='^delete_'),
-            ],
+            MAIN_MENU: menu_callbacks,
             CHOOSING_CATEGORY: [
-                CallbackQueryHandler(handle_category_selection),
+                CallbackQueryHandler(handle_category_selection, pattern=_P_CHOOSE_CATEGORY),
+                CallbackQueryHandler(ask_category_name, pattern=_P_CREATE_CATEGORY),
             ],
             WAITING_FOR_CATEGORY_NAME: [
-                MessageHandler(Filters.text & ~Filters.command, create_new_category),
-                CallbackQueryHandler(show_menu, pattern='^back_to_menu$'),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, create_new_category),
+                CallbackQueryHandler(show_menu, pattern=_P_BACK_TO_MENU),
             ],
             CHOOSING_FILE: [
                 CommandHandler("done", done),
-                CallbackQueryHandler(handle_file_menu),
+                CallbackQueryHandler(handle_done_button, pattern=_P_DONE),
+                CallbackQueryHandler(handle_back_to_categories, pattern=_P_BACK_TO_CATEGORIES),
                 MessageHandler(
-                    Filters.photo | Filters.video | Filters.document | 
-                    Filters.audio | Filters.voice | Filters.animation,
+                    filters.PHOTO | filters.VIDEO | filters.Document.ALL | 
+                    filters.AUDIO | filters.VOICE | filters.ANIMATION,
                     save_file
                 ),
             ],
@@ -968,71 +980,59 @@ def main() -> None:
             CommandHandler("start", start_command),
             CommandHandler("help", help_command),
             CommandHandler("menu", show_menu),
-            MessageHandler(Filters.text & ~Filters.command, handle_text_input),
+            MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_input),
         ],
         allow_reentry=True,
     )
     
-    dispatcher.add_handler(conv_handler)
+    application.add_handler(conv_handler)
     
-    # Delete webhook before starting the bot
     try:
-        updater.bot.delete_webhook()
-        logger.info("Deleted existing webhook")
-    except Exception as e:
-        logger.error(f"Error deleting webhook: {e}")
-    
-    # Check if we're running on Render
-    if os.environ.get('RENDER') == 'true':
-        # Get the Render URL from environment
-        PORT = int(os.environ.get('PORT', 10000))
-        RENDER_URL = os.environ.get('RENDER_EXTERNAL_URL')
-        
-        if RENDER_URL:
-            try:
-                # Set webhook with proper path
-                webhook_url = f"{RENDER_URL}/telegram"
-                logger.info(f"Attempting to set webhook to {webhook_url}")
-                
-                # Set the webhook with more detailed error messages
-                webhook_result = updater.bot.set_webhook(url=webhook_url)
-                
-                if webhook_result:
-                    logger.info(f"Successfully set webhook to {webhook_url}")
-                    
-                    # Verify webhook was set
-                    webhook_info = updater.bot.get_webhook_info()
-                    logger.info(f"Webhook verification - URL: {webhook_info.url}, Pending updates: {webhook_info.pending_update_count}")
-                    
-                    # Start webhook server
-                    updater.start_webhook(
+        # Check if we're running on Render
+        if os.environ.get('RENDER') == 'true':
+            # Get the Render URL from environment
+            PORT = int(os.environ.get('PORT', 10000))
+            RENDER_URL = os.environ.get('RENDER_EXTERNAL_URL')
+            
+            if RENDER_URL:
+                try:
+                    # run_webhook registers the webhook with Telegram and serves until stopped.
+                    # Telegram delivers up to max_connections updates in parallel, and only
+                    # requests carrying the secret token are accepted.
+                    webhook_url = f"{RENDER_URL}/telegram"
+                    secret_token = os.environ.get('WEBHOOK_SECRET') or secrets.token_urlsafe(32)
+                    logger.info(f"Attempting to set webhook to {webhook_url}")
+                    application.run_webhook(
                         listen="0.0.0.0",
                         port=PORT,
                         url_path="telegram",
-                        webhook_url=webhook_url
+                        webhook_url=webhook_url,
+                        max_connections=100,
+                        secret_token=secret_token,
+                        close_loop=False
                     )
-                    logger.info(f"Webhook server started on port {PORT}")
-                else:
-                    raise Exception("Webhook returned False")
-                    
-            except Exception as e:
-                logger.error(f"Failed to set up webhook: {e}")
-                # Fallback to polling if webhook setup fails
-                logger.info("Falling back to polling mode due to webhook setup failure")
-                updater.start_polling()
-                logger.info("Polling mode started")
-        else:
-            # Fallback to polling if RENDER_EXTERNAL_URL is not available
-            logger.warning("RENDER_EXTERNAL_URL not found, falling back to polling")
-            updater.start_polling()
-            logger.info("Polling mode started")
-    else:
-        # Start the Bot in polling mode
-        updater.start_polling()
-        logger.info("Bot started successfully in polling mode")
-    
-    # Run the bot until you press Ctrl-C or the process receives SIGINT, SIGTERM or SIGABRT
-    updater.idle()
+                    return
+                except InvalidToken:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to set up webhook: {e}")
+                    # Fallback to polling if webhook setup fails
+                    logger.info("Falling back to polling mode due to webhook setup failure")
+            else:
+                # Fallback to polling if RENDER_EXTERNAL_URL is not available
+                logger.warning("RENDER_EXTERNAL_URL not found, falling back to polling")
+        
+        # Start the Bot in polling mode; this deletes any existing webhook first.
+        # Runs until you press Ctrl-C or the process receives SIGINT, SIGTERM or SIGABRT
+        logger.info("Starting bot in polling mode")
+        application.run_polling()
+    except InvalidToken as e:
+        logger.error(f"Failed to get bot information: {e}")
+        logger.error("Please check your BOT_TOKEN")
+    finally:
+        # run_polling/run_webhook return once a stop signal was handled; close the
+        # MongoDB pool cleanly instead of leaving it to interpreter teardown
+        db.close_connection()
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
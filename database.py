@@ -1,11 +1,19 @@
 import os
+import json
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -22,29 +30,59 @@ USERS_COLLECTION = 'users'
 mongo_client = None
 db = None
 users_collection = None
+_initialized = False
+_init_lock = threading.Lock()
 
 # Database structure in MongoDB will be similar to the JSON structure:
 # {
 #   "_id": "user_id",
 #   "categories": {
 #     "category_name": [
-#       {"message_id": 123, "file_type": "photo", "file_name": "example.jpg"},
+#       {"message_id": 123, "file_type": "photo", "file_name": "example.jpg", "file_id": "AgAC..."},
 #     ]
 #   }
 # }
 
 def init_db() -> None:
-    """Initialize the MongoDB connection if it's not already initialized."""
-    global mongo_client, db, users_collection
+    """Initialize the MongoDB connection if it's not already initialized.
+    
+    This must run once before the other helpers are used (the bot calls it at
+    startup); the helpers themselves no longer check. Safe to call from several
+    threads, only the first call connects.
+    """
+    global mongo_client, db, users_collection, _initialized
+    
+    if _initialized:
+        return
     
     if not MONGO_URI:
         logger.error("MONGO_URI environment variable is not set!")
         raise ValueError("MONGO_URI environment variable must be set")
+    
+    with _init_lock:
+        if _initialized:
+            return
         
-    try:
-        if mongo_client is None:
-            # Create a MongoDB client
-            mongo_client = MongoClient(MONGO_URI)
+        try:
+            # Create a MongoDB client, shared by all threads. The pool is sized for
+            # bursts of concurrent handlers and timeouts are kept short so a slow
+            # server fails a request quickly instead of stalling the bot. Idle
+            # sockets are retired (and replaced, down to minPoolSize) before the
+            # server or a load balancer drops them, so the first request after a
+            # quiet period doesn't pay for a new TCP+TLS handshake.
+            mongo_client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=200,
+                minPoolSize=20,
+                maxIdleTimeMS=240000,
+                heartbeatFrequencyMS=20000,
+                compressors="zstd,zlib",
+                retryWrites=True,
+                serverSelectionTimeoutMS=3000,
+                socketTimeoutMS=5000,
+                connectTimeoutMS=3000,
+                appname=DB_NAME
+            )
             
             # Access the database
             db = mongo_client[DB_NAME]
@@ -52,22 +90,19 @@ def init_db() -> None:
             # Access the users collection
             users_collection = db[USERS_COLLECTION]
             
-            # Create an index on user_id for faster lookups
-            users_collection.create_index("_id")
-            
             logger.info(f"Successfully connected to MongoDB database '{DB_NAME}'")
             
             # Test the connection
             mongo_client.admin.command('ping')
             logger.info("MongoDB connection verified with ping")
-    except Exception as e:
-        logger.error(f"Error connecting to MongoDB: {e}")
-        raise
+            
+            _initialized = True
+        except Exception as e:
+            logger.error(f"Error connecting to MongoDB: {e}")
+            raise
 
 def get_user_data(user_id: int) -> Dict[str, Any]:
     """Get data for a specific user."""
-    init_db()
-    
     user_id_str = str(user_id)
     user_data = users_collection.find_one({"_id": user_id_str})
     
@@ -81,17 +116,44 @@ def get_user_data(user_id: int) -> Dict[str, Any]:
 
 def get_user_categories(user_id: int) -> List[str]:
     """Get all categories for a user."""
-    user_data = get_user_data(user_id)
+    user_id_str = str(user_id)
     
-    # Check if categories field exists
-    if "categories" not in user_data:
+    # Project just the category names, not the file lists
+    result = list(users_collection.aggregate([
+        {"$match": {"_id": user_id_str}},
+        {"$project": {"names": {"$objectToArray": {"$ifNull": ["$categories", {}]}}}},
+        {"$project": {"names": "$names.k"}},
+    ]))
+    
+    if not result:
         return []
     
-    return list(user_data["categories"].keys())
+    return result[0]["names"]
+
+def get_category_counts(user_id: int) -> Dict[str, int]:
+    """Get the number of files in each of a user's categories.
+    
+    Returns:
+        Dict mapping each category name to its file count
+    """
+    user_id_str = str(user_id)
+    
+    # Let MongoDB count, so only the names and sizes travel over the wire
+    result = users_collection.aggregate([
+        {"$match": {"_id": user_id_str}},
+        {"$project": {"k": {"$objectToArray": {"$ifNull": ["$categories", {}]}}}},
+        {"$unwind": "$k"},
+        {"$project": {"name": "$k.k", "n": {"$size": "$k.v"}}},
+    ])
+    
+    return {row["name"]: row["n"] for row in result}
 
-def add_file_to_category(user_id: int, category: str, message_id: int, file_type: str, file_name: Optional[str] = None) -> None:
-    """Add a file to a category."""
-    init_db()
+def add_file_to_category(user_id: int, category: str, message_id: int, file_type: str, file_name: Optional[str] = None, file_id: Optional[str] = None) -> None:
+    """Add a file to a category.
+    
+    The Telegram file_id is kept alongside the channel message_id so the files
+    can be resent in albums without copying each message.
+    """
     user_id_str = str(user_id)
     
     # Prepare the file info
@@ -103,6 +165,9 @@ def add_file_to_category(user_id: int, category: str, message_id: int, file_type
     if file_name:
         file_info["file_name"] = file_name
     
+    if file_id:
+        file_info["file_id"] = file_id
+    
     # Update the user document - push the new file to the category array
     result = users_collection.update_one(
         {"_id": user_id_str},
@@ -126,62 +191,82 @@ def get_files_in_category(user_id: int, category: str) -> List[Dict[str, Any]]:
     
     return user_data["categories"][category]
 
+def _get_files_window(user_id_str: str, category: str, start_idx: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Fetch one window of a category's files and the category's total size from MongoDB.
+    
+    Only the requested files travel over the wire, not the whole user document.
+    
+    Returns:
+        Tuple containing (files_list, total_files)
+    """
+    files_field = {"$ifNull": [f"$categories.{category}", []]}
+    result = list(users_collection.aggregate([
+        {"$match": {"_id": user_id_str}},
+        {"$project": {
+            "files": {"$slice": [files_field, start_idx, page_size]},
+            "total": {"$size": files_field},
+        }},
+    ]))
+    
+    if not result:
+        return [], 0
+    
+    return result[0]["files"], result[0]["total"]
+
 def get_files_in_category_paginated(user_id: int, category: str, page: int = 1, page_size: int = 5) -> Tuple[List[Dict[str, Any]], int, int]:
     """Get files in a category with pagination.
     
+    Only the requested page of files is fetched from MongoDB.
+    
     Returns:
         Tuple containing (files_list, total_pages, total_files)
     """
-    all_files = get_files_in_category(user_id, category)
-    total_files = len(all_files)
+    user_id_str = str(user_id)
+    
+    # Optimistically fetch the requested page; the total comes with it
+    page = max(1, page)
+    files, total_files = _get_files_window(user_id_str, category, (page - 1) * page_size, page_size)
     
     # Calculate total pages
     total_pages = (total_files + page_size - 1) // page_size if total_files > 0 else 1
     
     # Ensure page is within valid range
-    page = max(1, min(page, total_pages))
+    clamped_page = max(1, min(page, total_pages))
     
-    # Get files for the requested page
-    start_idx = (page - 1) * page_size
-    end_idx = min(start_idx + page_size, total_files)
+    if clamped_page != page:
+        # The requested page was past the end; fetch the last page instead
+        files, total_files = _get_files_window(user_id_str, category, (clamped_page - 1) * page_size, page_size)
     
-    return all_files[start_idx:end_idx], total_pages, total_files
+    return files, total_pages, total_files
 
 def create_category(user_id: int, category: str) -> None:
     """Create a new category for a user."""
-    init_db()
     user_id_str = str(user_id)
     
-    # Check if the category already exists
-    user_data = get_user_data(user_id)
-    categories = user_data.get("categories", {})
-    
-    if category not in categories:
-        # Update the user document to include the new empty category
+    # Add the new empty category only if it doesn't exist yet, in a single round-trip.
+    # If the user document exists and already has the category, the filter doesn't
+    # match and the upsert collides with the existing _id: nothing to do then.
+    try:
         result = users_collection.update_one(
-            {"_id": user_id_str},
+            {"_id": user_id_str, f"categories.{category}": {"$exists": False}},
             {"$set": {f"categories.{category}": []}},
             upsert=True
         )
-        
-        if result.modified_count > 0 or result.upserted_id:
-            logger.info(f"Created category '{category}' for user {user_id}")
-        else:
-            logger.warning(f"Failed to create category '{category}' for user {user_id}")
+    except DuplicateKeyError:
+        return
+    
+    if result.modified_count > 0 or result.upserted_id:
+        logger.info(f"Created category '{category}' for user {user_id}")
+    else:
+        logger.warning(f"Failed to create category '{category}' for user {user_id}")
 
 def delete_category(user_id: int, category: str) -> bool:
     """Delete a category for a user."""
-    init_db()
     user_id_str = str(user_id)
     
-    # Check if the category exists
-    user_data = get_user_data(user_id)
-    if "categories" not in user_data or category not in user_data["categories"]:
-        return False
-    
-    # Remove the category field
+    # Remove the category field; nothing is modified if the category doesn't exist
     result = users_collection.update_one(
-        {"_id": user_id_str},
+        {"_id": user_id_str, f"categories.{category}": {"$exists": True}},
         {"$unset": {f"categories.{category}": ""}}
     )
     
@@ -200,12 +285,11 @@ def import_from_json(json_file_path: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    import json
-    
     try:
         # Read the JSON file
-        with open(json_file_path, 'r') as f:
-            data = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
         
         init_db()
         
@@ -238,8 +322,6 @@ def export_to_json(json_file_path: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    import json
-    
     try:
         init_db()
         
@@ -255,8 +337,12 @@ def export_to_json(json_file_path: str) -> bool:
             }
         
         # Write to JSON file
-        with open(json_file_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        if orjson:
+            payload = orjson.dumps(export_data, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(export_data, indent=2).encode()
+        with open(json_file_path, 'wb') as f:
+            f.write(payload)
         
         logger.info(f"Successfully exported data to {json_file_path}")
         return True
@@ -266,8 +352,10 @@ def export_to_json(json_file_path: str) -> bool:
 
 def close_connection():
     """Close the MongoDB connection."""
-    global mongo_client
-    if mongo_client:
-        mongo_client.close()
-        logger.info("MongoDB connection closed")
-        mongo_client = None 
\ No newline at end of file
+    global mongo_client, _initialized
+    with _init_lock:
+        if mongo_client:
+            mongo_client.close()
+            logger.info("MongoDB connection closed")
+            mongo_client = None
+            _initialized = False 
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""Cached front for the database module.
+
+The category list and file counts are read on nearly every menu render but
+only change when a category is created or deleted or a file is added. They are
+kept in a short-lived in-process cache that the write helpers here invalidate.
+Everything else is passed straight through to database.
+
+The *_async variants are for the bot's handlers: pymongo is blocking, so they
+run the database work in the event loop's default executor, and answer cache
+hits directly without leaving the loop.
+"""
+import asyncio
+import weakref
+from threading import Lock, RLock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+import database
+from database import (
+    init_db,
+    get_user_data,
+    get_files_in_category,
+    get_files_in_category_paginated,
+    import_from_json,
+    export_to_json,
+    close_connection,
+)
+
+# Cache settings
+CACHE_MAXSIZE = 10_000
+CACHE_TTL = 60  # seconds
+
+_categories_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+_counts_cache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+_cache_lock = RLock()
+
+# Per-user locks held by the write helpers until they have invalidated, and by
+# cache fills until they have stored, so a fill that read before a write can't
+# store the old data afterwards. Different users never wait for each other;
+# locks are dropped automatically once no thread holds them.
+_user_locks = weakref.WeakValueDictionary()
+_user_locks_lock = Lock()
+
+def _user_lock(user_id: int) -> RLock:
+    """Get the lock serializing a user's writes and cache fills."""
+    with _user_locks_lock:
+        lock = _user_locks.get(user_id)
+        if lock is None:
+            lock = _user_locks[user_id] = RLock()
+    return lock
+
+def _get_cached(cache: TTLCache, user_id: int, load: Callable[[int], Any]) -> Any:
+    """Return a user's entry in cache, loading and storing it on a miss.
+    
+    The miss is filled under the user's lock, so it can't store data older
+    than a concurrent write.
+    """
+    with _cache_lock:
+        value = cache.get(user_id)
+    if value is None:
+        with _user_lock(user_id):
+            value = load(user_id)
+            with _cache_lock:
+                cache[user_id] = value
+    return value
+
+def _load_categories(user_id: int) -> Tuple[str, ...]:
+    return tuple(sorted(database.get_user_categories(user_id), key=str.lower))
+
+def get_user_categories(user_id: int) -> Tuple[str, ...]:
+    """Get all categories for a user, sorted case-insensitively and cached per user."""
+    return _get_cached(_categories_cache, user_id, _load_categories)
+
+def get_category_counts(user_id: int) -> Dict[str, int]:
+    """Get the number of files in each of a user's categories, cached per user."""
+    return _get_cached(_counts_cache, user_id, database.get_category_counts)
+
+def invalidate(user_id: int) -> None:
+    """Drop the cached category data of a user."""
+    with _cache_lock:
+        _categories_cache.pop(user_id, None)
+        _counts_cache.pop(user_id, None)
+
+def add_file_to_category(user_id: int, category: str, message_id: int, file_type: str, file_name: Optional[str] = None, file_id: Optional[str] = None) -> None:
+    """Add a file to a category and invalidate the user's cached data."""
+    with _user_lock(user_id):
+        try:
+            database.add_file_to_category(user_id, category, message_id, file_type, file_name, file_id)
+        finally:
+            invalidate(user_id)
+
+def create_category(user_id: int, category: str) -> None:
+    """Create a new category and invalidate the user's cached data."""
+    with _user_lock(user_id):
+        try:
+            database.create_category(user_id, category)
+        finally:
+            invalidate(user_id)
+
+def delete_category(user_id: int, category: str) -> bool:
+    """Delete a category and invalidate the user's cached data."""
+    with _user_lock(user_id):
+        try:
+            return database.delete_category(user_id, category)
+        finally:
+            invalidate(user_id)
+
+async def get_user_categories_async(user_id: int) -> Tuple[str, ...]:
+    """Async variant of get_user_categories."""
+    with _cache_lock:
+        categories = _categories_cache.get(user_id)
+    if categories is None:
+        categories = await asyncio.to_thread(get_user_categories, user_id)
+    return categories
+
+async def get_category_counts_async(user_id: int) -> Dict[str, int]:
+    """Async variant of get_category_counts."""
+    with _cache_lock:
+        counts = _counts_cache.get(user_id)
+    if counts is None:
+        counts = await asyncio.to_thread(get_category_counts, user_id)
+    return counts
+
+async def get_files_in_category_paginated_async(user_id: int, category: str, page: int = 1, page_size: int = 5) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Async variant of get_files_in_category_paginated."""
+    return await asyncio.to_thread(get_files_in_category_paginated, user_id, category, page, page_size)
+
+async def add_file_to_category_async(user_id: int, category: str, message_id: int, file_type: str, file_name: Optional[str] = None, file_id: Optional[str] = None) -> None:
+    """Async variant of add_file_to_category."""
+    await asyncio.to_thread(add_file_to_category, user_id, category, message_id, file_type, file_name, file_id)
+
+async def create_category_async(user_id: int, category: str) -> None:
+    """Async variant of create_category."""
+    await asyncio.to_thread(create_category, user_id, category)
+
+async def delete_category_async(user_id: int, category: str) -> bool:
+    """Async variant of delete_category."""
+    return await asyncio.to_thread(delete_category, user_id, category)
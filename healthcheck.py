@@ -1,14 +1,43 @@
 import os
+import sys
 import http.server
-import socketserver
 import threading
 import json
 import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Define port for health check server
 # Use a different port than the webhook server to avoid conflicts
 HEALTH_PORT = int(os.environ.get("HEALTH_PORT", 8080))
 
+# Reported in the health payload; the interpreter doesn't change at runtime
+PY_VERSION = f"Python {sys.version.split()[0]}"
+
+# Everything in the health payload except the timestamp, built once
+HEALTH_STATIC = {
+    "status": "healthy",
+    "environment": {
+        "python_version": PY_VERSION,
+        "system": os.name,
+        "render": os.environ.get('RENDER', 'false'),
+        "render_url": os.environ.get('RENDER_EXTERNAL_URL', 'not set'),
+        "port": os.environ.get('PORT', '10000'),
+        "health_port": HEALTH_PORT
+    },
+    "message": "Bot health check endpoint is working"
+}
+
+def health_payload() -> bytes:
+    """Serialize the health payload with the current timestamp."""
+    health_data = {**HEALTH_STATIC, "timestamp": datetime.datetime.now().isoformat()}
+    if orjson:
+        return orjson.dumps(health_data)
+    return json.dumps(health_data).encode()
+
 class HealthCheckHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         # Very simple ping endpoint for basic testing
@@ -23,27 +52,14 @@ class HealthCheckHandler(http.server.SimpleHTTPRequestHandler):
         # Check if this is the root path or a specific path
         if self.path == '/' or self.path == '/health':
             # Basic health check
+            payload = health_payload()
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
             self.end_headers()
             
-            # Gather system information
-            health_data = {
-                "status": "healthy",
-                "timestamp": datetime.datetime.now().isoformat(),
-                "environment": {
-                    "python_version": os.popen('python --version').read().strip(),
-                    "system": os.name,
-                    "render": os.environ.get('RENDER', 'false'),
-                    "render_url": os.environ.get('RENDER_EXTERNAL_URL', 'not set'),
-                    "port": os.environ.get('PORT', '10000'),
-                    "health_port": HEALTH_PORT
-                },
-                "message": "Bot health check endpoint is working"
-            }
-            
-            print(f"Health check requested, responding with: {json.dumps(health_data)[:100]}...")
-            self.wfile.write(json.dumps(health_data, indent=2).encode())
+            print(f"Health check requested, responding with: {payload[:100].decode(errors='replace')}...")
+            self.wfile.write(payload)
         else:
             # Handle other paths with a simple 404
             self.send_response(404)
@@ -55,9 +71,15 @@ class HealthCheckHandler(http.server.SimpleHTTPRequestHandler):
         # Log all requests to help with debugging
         print(f"Health server: {args[0]} - {args[1]}")
 
+class HealthCheckServer(http.server.ThreadingHTTPServer):
+    # Serve each probe in its own thread so one slow client can't hold up the rest
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
 def start_health_server():
     try:
-        with socketserver.TCPServer(("", HEALTH_PORT), HealthCheckHandler) as httpd:
+        with HealthCheckServer(("", HEALTH_PORT), HealthCheckHandler) as httpd:
             print(f"Health check server started at port {HEALTH_PORT}")
             print(f"Health check URL: http://localhost:{HEALTH_PORT}/health")
             print(f"Ping URL: http://localhost:{HEALTH_PORT}/ping")
@@ -11,7 +11,12 @@ import sys
 import json
 import logging
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Set up logging
 logging.basicConfig(
@@ -23,6 +28,9 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Number of user documents sent to MongoDB per bulk write
+BATCH_SIZE = 1000
+
 def migrate_json_to_mongodb(json_file_path, mongo_uri=None):
     """Migrate data from JSON file to MongoDB.
     
@@ -47,12 +55,14 @@ def migrate_json_to_mongodb(json_file_path, mongo_uri=None):
     try:
         # Read JSON data
         logger.info(f"Reading data from {json_file_path}")
-        with open(json_file_path, 'r') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON in {json_file_path}")
-                return False
+        with open(json_file_path, 'rb') as f:
+            raw = f.read()
+        try:
+            # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON in {json_file_path}")
+            return False
         
         # Connect to MongoDB
         logger.info(f"Connecting to MongoDB...")
@@ -81,8 +91,9 @@ def migrate_json_to_mongodb(json_file_path, mongo_uri=None):
         
         logger.info(f"Found {category_count} categories and {file_count} files in JSON data")
         
-        # Process each user in the JSON
+        # Write the users in unordered batches, one round-trip per batch
         migrated_users = 0
+        ops = []
         for user_id, user_data in data.get('users', {}).items():
             # Create document for MongoDB
             mongo_user = {
@@ -91,20 +102,18 @@ def migrate_json_to_mongodb(json_file_path, mongo_uri=None):
             }
             
             # Insert or update the user document
-            result = users_collection.replace_one(
-                {'_id': user_id},
-                mongo_user,
-                upsert=True
-            )
+            ops.append(ReplaceOne({'_id': user_id}, mongo_user, upsert=True))
             
-            if result.modified_count > 0 or result.upserted_id:
-                migrated_users += 1
+            if len(ops) >= BATCH_SIZE:
+                result = users_collection.bulk_write(ops, ordered=False)
+                migrated_users += result.modified_count + result.upserted_count
+                ops = []
         
-        logger.info(f"Migration complete: {migrated_users} users migrated to MongoDB")
+        if ops:
+            result = users_collection.bulk_write(ops, ordered=False)
+            migrated_users += result.modified_count + result.upserted_count
         
-        # Create index for faster lookups
-        users_collection.create_index('_id')
-        logger.info("Created index on _id field")
+        logger.info(f"Migration complete: {migrated_users} users migrated to MongoDB")
         
         return True
     